@@ -1,13 +1,21 @@
-def build_context(articles, max_chars=12000):
-    context = ""
+# Characters of source material handed to the writer
+MAX_CONTEXT_CHARS = 12000
 
-    for a in articles:
-        block = f"""
+
+def format_source(a) -> str:
+    return f"""
 SOURCE: {a['url']}
 TITLE: {a['title']}
 CONTENT:
 {a['text']}
 """
+
+
+def build_context(articles, max_chars=MAX_CONTEXT_CHARS):
+    context = ""
+
+    for a in articles:
+        block = format_source(a)
         if len(context) + len(block) > max_chars:
             break
 
@@ -20,4 +28,3 @@ def build_fallback_context(links):
     for item in links:
         lines.append(f"- {item['title']}")
     return "\n".join(lines)
-
@@ -1,27 +1,64 @@
 from newspaper import Article
-from urllib.parse import urlparse
+from requests.utils import get_encodings_from_content
 
-BLOCKED_DOMAINS = (
-    "nytimes.com",
-    "wsj.com",
-    "bloomberg.com",
-    "axios.com",
-    "forbes.com"
-)
+from app.services import http_client
+from app.services.provider_fixtures import provider_fixture
 
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
 
-def extract_article(url, timeout=10):
-    domain = urlparse(url).netloc
 
-    if any(d in domain for d in BLOCKED_DOMAINS):
-        raise ValueError(f"Blocked domain: {domain}")
+class EmptyArticle(ValueError):
+    pass
 
-    article = Article(url, request_timeout=timeout)
-    article.download()
+
+class NotHtml(ValueError):
+    pass
+
+
+def _decode(resp) -> str:
+    """
+    resp.text, except when the headers declare no charset: requests then
+    assumes ISO-8859-1 and garbles UTF-8 pages. Like newspaper's own
+    download, use the page's <meta> charset, else the detected encoding.
+    """
+    if "charset" in resp.headers.get("Content-Type", "").lower():
+        return resp.text
+
+    declared = get_encodings_from_content(resp.content[:4096].decode("ascii", "ignore"))
+    resp.encoding = declared[0] if declared else resp.apparent_encoding
+    return resp.text
+
+
+@provider_fixture("extract_html", ignore=("timeout",))
+def download_html(url, timeout=10) -> str:
+    """
+    I/O half of extraction: fetches the page over the shared HTTP pool
+    with a browser User-Agent. Which domains are worth fetching is
+    decided by domain_health.
+    """
+    resp = http_client.get(
+        url, timeout=timeout, headers={"User-Agent": http_client.BROWSER_USER_AGENT}
+    )
+    resp.raise_for_status()
+
+    content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in HTML_CONTENT_TYPES:
+        raise NotHtml(f"Not an HTML page ({content_type})")
+
+    return _decode(resp)
+
+
+def parse_html(url, html: str) -> dict:
+    """
+    CPU half of extraction: lxml parsing and text cleanup, no network.
+    Top-level and picklable so it can run in a process pool.
+    """
+    article = Article(url)
+    article.download(input_html=html)
     article.parse()
 
     if not article.text.strip():
-        raise ValueError("Empty article")
+        raise EmptyArticle("Empty article")
 
     return {
         "url": url,
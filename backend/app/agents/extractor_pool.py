@@ -1,20 +1,281 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from .extractor_agent import extract_article
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    TimeoutError as FuturesTimeout,
+)
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
 
-def extract_articles_parallel(links, max_workers=5):
+from requests.exceptions import Timeout as RequestTimeout
+
+from app.db.database import SessionLocal
+from app.db.repository import get_extractions, save_extractions
+from app.services import domain_health
+from app.services.canonical_url import url_hash
+from app.services.metrics import record_cache
+from app.services.tracing import set_attribute
+
+from .context_builder_agent import MAX_CONTEXT_CHARS, format_source
+from .extractor_agent import EmptyArticle, NotHtml, download_html, parse_html
+
+# Wall-clock seconds for the whole batch; stragglers past it are abandoned
+EXTRACTION_DEADLINE = float(os.getenv("EXTRACTION_DEADLINE", "20"))
+# A trimmed source shorter than this is not worth a slot in the context
+MIN_SOURCE_CHARS = 500
+# lxml parsing holds the GIL, so pages are parsed in worker processes;
+# 0 parses in the download threads instead
+PARSE_PROCESSES = int(
+    os.getenv("EXTRACTION_PARSE_PROCESSES", str(min(4, os.cpu_count() or 1)))
+)
+
+# Extractions are reused across topics and runs; 0 disables the cache
+EXTRACTION_CACHE_TTL = timedelta(hours=int(os.getenv("EXTRACTION_CACHE_TTL_HOURS", "168")))
+# Empty, non-HTML or permanently refused (4xx) pages are skipped for this
+# long before being retried; transient failures are not cached
+EXTRACTION_FAILURE_TTL = timedelta(hours=int(os.getenv("EXTRACTION_FAILURE_TTL_HOURS", "6")))
+
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Long-lived parser processes, started on first use. spawn rather than
+    fork: forking a process full of threads and open DB connections is
+    not safe.
+    """
+    global _parse_pool
+
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ProcessPoolExecutor(
+                    max_workers=PARSE_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+    return _parse_pool
+
+
+def _parse(url: str, html: str) -> dict:
+    """Parses in the process pool (in the calling thread if it is off)."""
+    global _parse_pool
+
+    if PARSE_PROCESSES <= 0:
+        return parse_html(url, html)
+
+    try:
+        return _get_parse_pool().submit(parse_html, url, html).result()
+    except BrokenProcessPool:
+        # A parser died (e.g. OOM); start a fresh pool next time
+        print("⚠️ Parser pool broke, parsing in-thread")
+        with _parse_pool_lock:
+            _parse_pool = None
+        return parse_html(url, html)
+
+
+def _timed_extract(url: str, timeout, downloading: set[str]) -> tuple[dict, float]:
+    """
+    Downloads within the domain's concurrency slot, then parses. seconds
+    covers the download only, and url is in `downloading` while it runs:
+    waiting for a slot or a parser process is local queueing, not the
+    publisher's doing.
+    """
+    with domain_health.slot(domain_health.domain_of(url)):
+        downloading.add(url)
+        start = time.monotonic()
+        try:
+            html = download_html(url, timeout)
+        finally:
+            seconds = time.monotonic() - start
+            downloading.discard(url)
+
+    return _parse(url, html), seconds
+
+
+def _outcome(error: Exception) -> str:
+    if isinstance(error, EmptyArticle):
+        return domain_health.EMPTY
+    if isinstance(error, (RequestTimeout, TimeoutError)):
+        return domain_health.TIMEOUT
+    return domain_health.ERROR
+
+
+def _permanent_failure(error: Exception) -> bool:
+    """Failures a retry within EXTRACTION_FAILURE_TTL would only repeat."""
+    if isinstance(error, (EmptyArticle, NotHtml)):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+def _cached_extractions(keys: list[str]) -> dict[str, dict | None]:
+    if not EXTRACTION_CACHE_TTL or not keys:
+        return {}
+
+    db = SessionLocal()
+    try:
+        return get_extractions(db, keys)
+    except Exception as e:
+        db.rollback()
+        print("[Extraction cache] lookup failed:", e)
+        return {}
+    finally:
+        db.close()
+
+
+def _store_extractions(results: dict[str, tuple[str, dict | None, str | None]]):
+    if not EXTRACTION_CACHE_TTL or not results:
+        return
+
+    db = SessionLocal()
+    try:
+        save_extractions(
+            db, results, ttl=EXTRACTION_CACHE_TTL, failure_ttl=EXTRACTION_FAILURE_TTL
+        )
+    except Exception as e:
+        db.rollback()
+        print("[Extraction cache] write failed:", e)
+    finally:
+        db.close()
+
+
+def _fit(article: dict, room: int) -> dict | None:
+    """Trims the article's text so its context block fits in `room` chars."""
+    overflow = len(format_source(article)) - room
+    if overflow <= 0:
+        return article
+
+    keep = len(article["text"]) - overflow
+    if keep < MIN_SOURCE_CHARS:
+        return None
+    return {**article, "text": article["text"][:keep].rstrip()}
+
+
+def extract_articles_parallel(
+    links,
+    max_workers=5,
+    *,
+    deadline=EXTRACTION_DEADLINE,
+    max_chars=MAX_CONTEXT_CHARS,
+    timeout=10,
+):
+    """
+    Downloads links on max_workers threads, each handing its page to the
+    parser process pool, and returns articles in completion order,
+    stopping as soon as the texts fill build_context's max_chars budget
+    or the deadline passes. Texts are trimmed to what the context can
+    hold; unfinished extractions are cancelled or left to finish in the
+    background. Pages extracted (or permanently failed) recently come
+    from the extraction_cache table without any network I/O, and domains
+    whose circuit is open (see domain_health) are skipped.
+    """
     articles = []
+    used = 0
+    budget_met = False
+    fresh = {}  # url_hash -> (url, article, error) for the cache
+    outcomes = []  # (url, outcome, seconds, error) for domain health
+    started = time.monotonic()
+
+    def take(article: dict) -> bool:
+        """Adds a source to the result; True once the budget is met."""
+        nonlocal used
+        article = _fit(article, max_chars - used)
+        if article is None:
+            return True
+        articles.append(article)
+        used += len(format_source(article))
+        return max_chars - used < MIN_SOURCE_CHARS
+
+    keys = {item["link"]: url_hash(item["link"]) for item in links}
+    cached = _cached_extractions(list(set(keys.values())))
+
+    pending = {}  # url_hash -> url still to extract
+    for url, key in keys.items():
+        record_cache("extraction", key in cached)
+        if key not in cached:
+            pending.setdefault(key, url)
+        elif cached[key] is None:
+            print(f"[SKIPPED] {url}: failed recently (cached)")
+        elif not budget_met:
+            budget_met = take({**cached[key], "url": url})
+
+    skipped, probes = {}, {}
+    if pending and not budget_met:
+        # Domains with an open circuit are not worth a download slot
+        admitted, skipped, probes = domain_health.admit(list(pending.values()))
+        for url, reason in skipped.items():
+            print(f"[SKIPPED] {url}: {reason}")
+        admitted = set(admitted)
+        # Probes are submitted first, so a full budget rarely cancels them
+        pending = dict(
+            sorted(
+                ((key, url) for key, url in pending.items() if url in admitted),
+                key=lambda item: item[1] not in probes,
+            )
+        )
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    downloading = set()  # urls whose download is in flight (set ops are atomic)
+    future_map = {}
+    if not budget_met:
         future_map = {
-            executor.submit(extract_article, item["link"]): item["link"]
-            for item in links
+            executor.submit(_timed_extract, url, min(timeout, deadline), downloading): (key, url)
+            for key, url in pending.items()
         }
 
-        for future in as_completed(future_map):
-            url = future_map[future]
+    try:
+        for future in as_completed(future_map, timeout=deadline):
+            key, url = future_map[future]
             try:
-                articles.append(future.result())
+                article, seconds = future.result()
             except Exception as e:
                 print(f"[SKIPPED] {url}: {e}")
+                error = str(e) or e.__class__.__name__
+                if _permanent_failure(e):
+                    fresh[key] = (url, None, error)
+                outcomes.append((url, _outcome(e), None, error))
+                continue
+
+            fresh[key] = (url, article, None)
+            outcomes.append((url, domain_health.OK, seconds, None))
+            if take(article):
+                budget_met = True
+                break
+
+    except FuturesTimeout:
+        print(f"⏱️ Extraction deadline ({deadline:g}s) hit with {len(articles)} sources")
+        # Still downloading at the deadline: as good as a timeout for this
+        # domain. Nothing is recorded for URLs still waiting locally.
+        for url in set(downloading):
+            outcomes.append(
+                (url, domain_health.TIMEOUT, None, "Still downloading at the extraction deadline")
+            )
+
+    finally:
+        abandoned = sum(1 for f in future_map if not f.done())
+        # Do not wait for stragglers; queued ones are cancelled outright
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if budget_met:
+        print(f"✂️ Context budget met after {len(articles)} sources")
+
+    _store_extractions(fresh)
+    domain_health.record(outcomes)
+    # Probes cancelled or abandoned without an outcome go back to open
+    recorded = {url for url, *_ in outcomes}
+    domain_health.release_probes(
+        {url: until for url, until in probes.items() if url not in recorded}
+    )
 
+    set_attribute("extraction.sources", len(articles))
+    set_attribute("extraction.cached", len(keys) - len(pending) - len(skipped))
+    set_attribute("extraction.circuit_skipped", len(skipped))
+    set_attribute("extraction.abandoned", abandoned)
+    set_attribute("extraction.seconds", round(time.monotonic() - started, 3))
     return articles
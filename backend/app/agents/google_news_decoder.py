@@ -1,18 +1,133 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
 from googlenewsdecoder import gnewsdecoder
 
+from app.db.database import SessionLocal
+from app.db.repository import get_gnews_urls, save_gnews_urls
+from app.services.metrics import record_cache
+from app.services.provider_fixtures import provider_fixture
+from app.services.tracing import span
+from .url_resolver_agent import resolve_google_news_url
+
+# Parallel decodes per batch (each is one or more round trips to Google)
+DECODE_CONCURRENCY = int(os.getenv("GNEWS_DECODE_CONCURRENCY", "4"))
+# Publisher URLs do not change; failures are retried sooner
+DECODE_TTL = timedelta(days=int(os.getenv("GNEWS_URL_TTL_DAYS", "30")))
+DECODE_FAILURE_TTL = timedelta(hours=1)
+
+
+class UndecodableUrl(ValueError):
+    pass
+
+
+@lru_cache(maxsize=4096)
+def _decode(url: str) -> str:
+    decoded = gnewsdecoder(url)
+
+    if decoded.get("status"):
+        return decoded.get("decoded_url")
+
+    # Raise instead of returning None so failures are not memoized
+    raise UndecodableUrl(decoded.get("message") or "URL could not be decoded")
+
 
 def decode_google_news_url(url: str) -> str | None:
     """
     Decodes Google News RSS article URLs (CBMi... format)
-    into the original publisher URL.
+    into the original publisher URL. Successful decodes are memoized
+    for the life of the process.
     """
     try:
-        decoded = gnewsdecoder(url)
-
-        if decoded.get("status"):
-            return decoded.get("decoded_url")
+        return _decode(url)
 
     except Exception as e:
         print("[Decoder error]", e)
 
     return None
+
+
+def _decode_for_batch(url: str, publisher: str | None = None) -> tuple[str | None, bool]:
+    """
+    (publisher_url, cacheable): links gnewsdecoder cannot decode are
+    followed through their redirects instead; network errors are not
+    cached.
+    """
+    try:
+        with span("gnews.decode"):
+            return _decode(url), True
+    except Exception as e:
+        print("[Decoder error]", e)
+        cacheable = isinstance(e, UndecodableUrl)
+
+    with span("gnews.resolve"):
+        resolved = resolve_google_news_url(url, publisher=publisher)
+    if resolved:
+        return resolved, True
+    return None, cacheable
+
+
+@provider_fixture("gnews")
+def decode_google_news_urls(
+    urls: list[str], publishers: dict[str, str] | None = None
+) -> dict[str, str | None]:
+    """
+    Decodes many links at once: known ones come from the gnews_urls table,
+    the rest are decoded DECODE_CONCURRENCY at a time and stored for
+    later topics and runs. publishers maps a link to its publisher's site
+    URL (the feed entry's <source>), a hint for the redirect fallback.
+    Recorded and replayed as the "gnews" provider, so replay stays offline.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return {}
+    publishers = publishers or {}
+
+    db = SessionLocal()
+    try:
+        try:
+            results = get_gnews_urls(db, urls)
+        except Exception as e:
+            db.rollback()
+            print("[Decoder] cache lookup failed:", e)
+            results = {}
+
+        missing = [u for u in urls if u not in results]
+        for url in urls:
+            record_cache("gnews_url", url in results)
+
+        if missing:
+            with ThreadPoolExecutor(
+                max_workers=min(DECODE_CONCURRENCY, len(missing))
+            ) as executor:
+                # One copy of the caller's context per task so spans nest
+                # under the caller's trace
+                contexts = [contextvars.copy_context() for _ in missing]
+                decoded = list(
+                    executor.map(
+                        lambda ctx, u: ctx.run(_decode_for_batch, u, publishers.get(u)),
+                        contexts,
+                        missing,
+                    )
+                )
+
+            to_store = {}
+            for url, (publisher_url, cacheable) in zip(missing, decoded):
+                results[url] = publisher_url
+                if cacheable:
+                    to_store[url] = publisher_url
+
+            try:
+                save_gnews_urls(
+                    db, to_store, ttl=DECODE_TTL, failure_ttl=DECODE_FAILURE_TTL
+                )
+            except Exception as e:
+                db.rollback()
+                print("[Decoder] cache write failed:", e)
+
+        return results
+    finally:
+        db.close()
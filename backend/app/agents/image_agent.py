@@ -3,7 +3,6 @@ from io import BytesIO
 from PIL import Image, ImageEnhance
 import cloudinary
 import cloudinary.uploader
-import requests
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 import certifi
@@ -18,6 +17,10 @@ import re
 from google import genai
 from google.genai import types
 
+from app.services import http_client
+from app.services.provider_fixtures import provider_fixture
+from app.services.tracing import span
+
 load_dotenv()
 
 # ── Hugging Face ──────────────────────────────────────────────────────────────
@@ -50,6 +53,7 @@ cloudinary.config(
 
 
 class ImageAgent:
+    @provider_fixture("image")
     def run(
         self,
         prompt: str,
@@ -127,14 +131,15 @@ class ImageAgent:
         # ── 1) PRIMARY: Hugging Face - FLUX.1-schnell ──────────────────────────
         print("Trying Hugging Face Inference (FLUX.1-schnell)...")
         try:
-            image = HF_CLIENT.text_to_image(
-                prompt=final_prompt,
-                model="black-forest-labs/FLUX.1-schnell",
-                width=1344,
-                height=768,
-                num_inference_steps=26,
-                guidance_scale=7.0,
-            )
+            with span("image.generate", provider="hf-flux"):
+                image = HF_CLIENT.text_to_image(
+                    prompt=final_prompt,
+                    model="black-forest-labs/FLUX.1-schnell",
+                    width=1344,
+                    height=768,
+                    num_inference_steps=26,
+                    guidance_scale=7.0,
+                )
             print("✅ HF FLUX succeeded!")
             url = self._process_and_upload(image, topic, "hf-flux")
             return url, "black-forest-labs/FLUX.1-schnell"
@@ -145,14 +150,15 @@ class ImageAgent:
         # ── 2) FALLBACK: Google Gemini ─────────────────────────────────────────
         print(f"Trying Google Gemini ({GEMINI_MODEL}) with retries...")
         try:
-            image = generate_gemini_image_same_model_retry(
-                genai_client=genai_client,
-                model_name=GEMINI_MODEL,
-                prompt=final_prompt,
-                max_retries=6,
-                base_delay=1.5,
-                jitter=0.6,
-            )
+            with span("image.generate", provider="gemini"):
+                image = generate_gemini_image_same_model_retry(
+                    genai_client=genai_client,
+                    model_name=GEMINI_MODEL,
+                    prompt=final_prompt,
+                    max_retries=6,
+                    base_delay=1.5,
+                    jitter=0.6,
+                )
 
             print("✅ Gemini succeeded!")
             url = self._process_and_upload(image, topic, "gemini")
@@ -172,20 +178,21 @@ class ImageAgent:
                 "response_format": "url",
             }
 
-            response = requests.post(
-                XAI_URL,
-                headers=XAI_HEADERS,
-                json=xai_payload,
-                timeout=90,
-                verify=certifi.where(),
-            )
-            response.raise_for_status()
+            with span("image.generate", provider="xai-grok"):
+                response = http_client.post(
+                    XAI_URL,
+                    headers=XAI_HEADERS,
+                    json=xai_payload,
+                    timeout=90,
+                    verify=certifi.where(),
+                )
+                response.raise_for_status()
 
-            data = response.json()
-            temp_url = data["data"][0]["url"]
+                data = response.json()
+                temp_url = data["data"][0]["url"]
 
-            img_resp = requests.get(temp_url, timeout=45)
-            img_resp.raise_for_status()
+                img_resp = http_client.get(temp_url, timeout=45)
+                img_resp.raise_for_status()
 
             image = Image.open(BytesIO(img_resp.content)).convert("RGB")
             print("✅ xAI Grok succeeded!")
@@ -216,23 +223,24 @@ class ImageAgent:
         timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
         public_id = f"news_{safe_topic}_{timestamp}_{provider}"
 
-        result = cloudinary.uploader.upload(
-            buffer,
-            folder="ai_news_images",
-            public_id=public_id,
-            overwrite=False,
-            resource_type="image",
-            format="jpg",
-            quality="auto:good",
-            tags=[
-                "ai-generated",
-                "photojournalism",
-                "provider",
-                "documentary",
-                "landscape",
-                "16:9",
-            ],
-        )
+        with span("image.upload", provider="cloudinary", bytes=buffer.getbuffer().nbytes):
+            result = cloudinary.uploader.upload(
+                buffer,
+                folder="ai_news_images",
+                public_id=public_id,
+                overwrite=False,
+                resource_type="image",
+                format="jpg",
+                quality="auto:good",
+                tags=[
+                    "ai-generated",
+                    "photojournalism",
+                    "provider",
+                    "documentary",
+                    "landscape",
+                    "16:9",
+                ],
+            )
 
         return result["secure_url"]
 
@@ -3,6 +3,8 @@ import json
 from dotenv import load_dotenv
 from openai import OpenAI, OpenAIError
 
+from app.services.provider_fixtures import provider_fixture
+
 load_dotenv()
 
 
@@ -56,6 +58,7 @@ class ImagePromptAgent:
         )
         self.grok_model = grok_model or os.environ.get("XAI_PROMPT_MODEL", "grok-4")
 
+    @provider_fixture("image_prompt")
     def run(self, topic: str, category: str = None) -> dict:
         topic = (topic or "").strip()
         if not topic:
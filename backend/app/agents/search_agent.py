@@ -1,23 +1,42 @@
 import feedparser
+import os
 from urllib.parse import quote_plus
 
-from .google_news_decoder import decode_google_news_url
+from app.services import http_client
+from app.services.provider_fixtures import provider_fixture
+from app.services.tracing import span
+from .google_news_decoder import decode_google_news_urls
 
 GOOGLE_NEWS_RSS = "https://news.google.com/rss/search"
+# Reuse window when Google sends no Cache-Control of its own
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "900"))
 
 
+@provider_fixture("search")
 def search_news(topic, limit=5):
     query = quote_plus(topic.strip())
     url = f"{GOOGLE_NEWS_RSS}?q={query}&hl=en-US&gl=US&ceid=US:en"
 
-    feed = feedparser.parse(url)
+    with span("search.fetch_feed") as current:
+        resp = http_client.cached_get(url, default_ttl=SEARCH_CACHE_TTL)
+        if current is not None:
+            current.set_attribute("http.from_cache", resp.from_cache)
+    resp.raise_for_status()
+    feed = feedparser.parse(resp.content)
+
+    entries = feed.entries[:limit]
+
+    # Concurrent, and cached across topics and runs
+    with span("search.decode_urls", count=len(entries)):
+        decoded = decode_google_news_urls(
+            [entry.link for entry in entries],
+            {entry.link: entry.get("source", {}).get("href") for entry in entries},
+        )
 
     results = []
-    for entry in feed.entries:
+    for entry in entries:
         raw_link = entry.link
-        decoded_link = decode_google_news_url(raw_link)
-
-        final_link = decoded_link or raw_link
+        final_link = decoded.get(raw_link) or raw_link
 
         results.append(
             {
@@ -27,7 +46,4 @@ def search_news(topic, limit=5):
             }
         )
 
-        if len(results) >= limit:
-            break
-
     return results
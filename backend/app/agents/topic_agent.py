@@ -1,10 +1,24 @@
+import calendar
+import contextvars
 import feedparser
-import random
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from sqlalchemy.orm import Session
 
-from app.db.models import Article
-from .google_news_decoder import decode_google_news_url
+from app.db.repository import (
+    existing_topics,
+    get_feed_states,
+    get_recent_fingerprints,
+    save_feed_state,
+)
+from app.services import http_client
+from app.services.metrics import record_cache
+from app.services.provider_fixtures import provider_fixture
+from app.services.simhash import SimHashIndex, simhash, to_unsigned
+from app.services.topic_ranking import rank_topics
+from app.services.tracing import span
+from .google_news_decoder import decode_google_news_urls
 
 REGIONAL_FEEDS = [
     "https://news.google.com/rss?hl=en&gl=US&ceid=US:en",
@@ -15,57 +29,219 @@ REGIONAL_FEEDS = [
 ]
 
 
+FEED_TIMEOUT = (5, 10)
+# Reuse window for feeds that send no Cache-Control of their own
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", "600"))
+
+# Headlines within this many SimHash bits are treated as the same story
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "6"))
+NEAR_DUP_WINDOW_DAYS = int(os.getenv("NEAR_DUP_WINDOW_DAYS", "30"))
+
+
+def _feed_topics(feed, feed_url: str) -> list[dict]:
+    topics = []
+    for position, entry in enumerate(feed.entries):
+        title = entry.title
+
+        # Clean source suffix
+        title = re.sub(r"\s+-\s+.*$", "", title)
+        title = title.strip(" -–:")
+
+        # Avoid weak topics
+        if len(title.split()) < 4:
+            continue
+
+        published = getattr(entry, "published_parsed", None)
+
+        # Decoded lazily, only for the topics actually picked
+        topics.append(
+            {
+                "title": title,
+                "raw_link": entry.link,
+                "source": entry.get("source", {}).get("href"),
+                "summary": getattr(entry, "summary", ""),
+                # Ranking signals (see topic_ranking)
+                "feed": feed_url,
+                "position": position,
+                "published": calendar.timegm(published) if published else None,
+            }
+        )
+    return topics
+
+
+def _resolve_links(topics: list[dict]) -> list[dict]:
+    raw_links = [topic.get("raw_link") or topic.get("link", "") for topic in topics]
+    with span("topic.decode_urls", count=len(raw_links)):
+        decoded = decode_google_news_urls(
+            raw_links, {link: topic.get("source") for topic, link in zip(topics, raw_links)}
+        )
+
+    return [
+        {
+            "title": topic["title"],
+            "link": decoded.get(raw_link) or raw_link,
+            "summary": topic.get("summary", ""),
+        }
+        for topic, raw_link in zip(topics, raw_links)
+    ]
+
+
+def _fetch_feed(url: str, state) -> dict:
+    """
+    GET of one feed through the on-disk HTTP cache, which owns freshness
+    and revalidation (ETag/Last-Modified, 304). A body with the same
+    validators as the one the stored topics were parsed from returns
+    those topics unparsed.
+    """
+    with span("topic.fetch_feed", url=url) as current:
+        resp = http_client.cached_get(url, timeout=FEED_TIMEOUT, default_ttl=FEED_CACHE_TTL)
+        if current is not None:
+            current.set_attribute("http.status_code", resp.status_code)
+            current.set_attribute("http.from_cache", resp.from_cache)
+
+    resp.raise_for_status()
+    record_cache("topic_feed", resp.from_cache)
+
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    not_modified = (
+        state is not None
+        and bool(etag or last_modified)
+        and (etag, last_modified) == (state.etag, state.last_modified)
+    )
+
+    return {
+        "not_modified": not_modified,
+        "entries": (
+            list(state.entries or [])
+            if not_modified
+            else _feed_topics(feedparser.parse(resp.content), url)
+        ),
+        "etag": etag,
+        "last_modified": last_modified,
+    }
+
+
 class TopicAgent:
     def __init__(self, db: Session):
         self.db = db
 
     def run(self) -> dict:
-        all_topics: list[dict] = []
+        picked = self.pick(1)
+        if not picked:
+            raise RuntimeError("Every candidate topic is already taken")
+        return picked[0]
 
-        for feed_url in REGIONAL_FEEDS:
-            feed = feedparser.parse(feed_url)
+    @provider_fixture("topics")
+    def fetch_candidates(self) -> list[dict]:
+        """
+        Every usable headline across the regional Google News feeds.
+        Feeds are fetched concurrently through the HTTP cache; one whose
+        body has not changed since the last run reuses its stored topics
+        unparsed.
+        """
+        states = get_feed_states(self.db, REGIONAL_FEEDS)
 
-            for entry in feed.entries:
-                title = entry.title
+        with ThreadPoolExecutor(max_workers=len(REGIONAL_FEEDS)) as executor:
+            futures = {
+                # Copy the context so spans nest under the caller's trace
+                executor.submit(
+                    contextvars.copy_context().run, _fetch_feed, url, states.get(url)
+                ): url
+                for url in REGIONAL_FEEDS
+            }
 
-                # Clean source suffix
-                title = re.sub(r"\s+-\s+.*$", "", title)
-                title = title.strip(" -–:")
+            fetched = {}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    fetched[url] = future.result()
+                except Exception as e:
+                    print(f"[TopicAgent] feed failed: {url} | {e.__class__.__name__}: {e}")
 
-                # Avoid weak topics
-                if len(title.split()) < 4:
-                    continue
+        # Keep feed order stable; DB writes stay on this thread
+        all_topics: list[dict] = []
+        for url in REGIONAL_FEEDS:
+            if url not in fetched:
+                continue
+            result = fetched[url]
+            save_feed_state(
+                self.db,
+                url=url,
+                etag=result["etag"],
+                last_modified=result["last_modified"],
+                entries=None if result["not_modified"] else result["entries"],
+            )
+            all_topics.extend(result["entries"])
+
+        return all_topics
 
-                raw_link = entry.link
-                decoded_link = decode_google_news_url(raw_link)
-                final_link = decoded_link or raw_link
+    def _recent_index(self) -> SimHashIndex:
+        index = SimHashIndex(max_distance=NEAR_DUP_MAX_DISTANCE)
+        for topic, topic_fp, title_fp in get_recent_fingerprints(
+            self.db, days=NEAR_DUP_WINDOW_DAYS
+        ):
+            index.add(to_unsigned(topic_fp), topic)
+            index.add(to_unsigned(title_fp), topic)
+        return index
 
-                all_topics.append(
-                    {
-                        "title": title,
-                        "link": final_link,
-                        "summary": getattr(entry, "summary", ""),
-                    }
-                )
+    def pick(self, n: int = 1) -> list[dict]:
+        """
+        Returns up to n distinct stories not yet covered or claimed in the
+        DB, hottest first (empty only if every candidate is taken).
+        Headlines are clustered across feeds and ranked by coverage,
+        position and recency, so the same feeds give the same queue. Only
+        the picked topics get their Google News link decoded.
+        """
+        all_topics = self.fetch_candidates()
 
         if not all_topics:
-            return {
-                "title": "Global geopolitical and economic developments",
-                "link": "",
-                "summary": "",
-            }
+            return [
+                {
+                    "title": "Global geopolitical and economic developments",
+                    "link": "",
+                    "summary": "",
+                }
+            ]
+
+        # 🔥 One entry per story, hottest first
+        ranked = rank_topics(all_topics, feed_count=len(REGIONAL_FEEDS))
+
+        # ✅ Avoid topics already covered or claimed by a run (one query)
+        # and duplicates within the batch
+        taken = existing_topics(self.db, list({t["title"] for t in all_topics}))
+        if taken:
+            print(f"⏭️ {len(taken)} candidate title(s) already covered or claimed by a run")
+        index = self._recent_index()
+
+        picked: list[dict] = []
+        for cluster in ranked:
+            topic = cluster["topic"]
+            if any(member["title"] in taken for member in cluster["members"]):
+                continue
 
-        random.shuffle(all_topics)
+            # 🧬 Same story, different headline (other region / outlet)
+            fingerprint = simhash(topic["title"])
+            duplicate_of = index.near(fingerprint)
+            if duplicate_of is not None:
+                print(f"🔁 Near-duplicate skipped: '{topic['title']}' ~ '{duplicate_of}'")
+                continue
+            index.add(fingerprint, topic["title"])
 
-        # ✅ Avoid duplicates already in DB
-        for topic in all_topics:
-            exists = (
-                self.db.query(Article)
-                .filter(Article.topic == topic["title"])
-                .first()
+            print(
+                f"🔥 Picked '{topic['title']}' | score={cluster['score']} "
+                f"| {len(cluster['members'])} headline(s)"
             )
-            if not exists:
-                return topic
+            picked.append(topic)
+            if len(picked) >= n:
+                break
 
-        # 🔁 Fallback if all topics already exist
-        return random.choice(all_topics)
+        # 🔁 Fallback if every story was a near-duplicate: the hottest one
+        # not already taken (none at all if every candidate is)
+        if not picked:
+            picked = [
+                cluster["topic"]
+                for cluster in ranked
+                if not any(member["title"] in taken for member in cluster["members"])
+            ][:1]
+        return _resolve_links(picked) if picked else []
@@ -5,6 +5,7 @@ from openai import OpenAI, OpenAIError
 from google import genai
 from google.genai import types
 from constants import GPT_MODEL
+from app.services.provider_fixtures import provider_fixture
 
 load_dotenv()
 
@@ -35,6 +36,7 @@ ALLOWED_CATEGORIES = [
 
 
 class WriterAgent:
+    @provider_fixture("writer")
     def run(self, topic: str, context: str):
         system_message = (
             "You are a professional international news journalist.\n"
@@ -1,10 +1,12 @@
 import os
 import tempfile
-import requests
 import tweepy
 import logging
 from dotenv import load_dotenv
 
+from app.services import http_client
+from app.services.provider_fixtures import provider_fixture
+
 logger = logging.getLogger(__name__)
 load_dotenv()
 
@@ -137,6 +139,7 @@ class XPosterAgent:
             logger.exception("❌ Failed to post article with image")
             return None
 
+    @provider_fixture("x")
     def post_article_with_image_url(self, title: str, slug: str, image_url: str) -> str | None:
         """
         Download remote image → upload to X → post → clean up temp file
@@ -146,7 +149,7 @@ class XPosterAgent:
         try:
             logger.info(f"Downloading image: {image_url}")
 
-            r = requests.get(image_url, timeout=30)
+            r = http_client.get(image_url, timeout=30)
             r.raise_for_status()
 
             # Decide extension
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, Text, TIMESTAMP, ForeignKey, func
+from sqlalchemy import BigInteger, Column, Integer, Float, Text, TIMESTAMP, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import text
 from sqlalchemy import Boolean
 from pydantic import BaseModel
@@ -54,6 +54,27 @@ class Article(Base):
     category = relationship("Category")
 
 
+class ArticleFingerprint(Base):
+    """SimHash fingerprints (signed 64-bit) of an article's topic and title."""
+
+    __tablename__ = "article_fingerprints"
+
+    article_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("articles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    topic_fp = Column(BigInteger, nullable=False)
+    title_fp = Column(BigInteger, nullable=False)
+
+    created_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True,
+    )
+
+
 class NotificationToken(Base):
     __tablename__ = "notification_tokens"
 
@@ -79,6 +100,252 @@ class NotificationToken(Base):
         nullable=False,
     )
 
+class PipelineRun(Base):
+    """
+    One article generation attempt. Each stage's output is persisted as it
+    completes so a failed run can resume instead of redoing paid work.
+    """
+
+    __tablename__ = "pipeline_runs"
+    __table_args__ = (
+        # One run per topic title: serves existing_topics and backs
+        # create_pipeline_run's claim
+        Index("uq_pipeline_runs_topic_title", text("(topic ->> 'title')"), unique=True),
+    )
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+    )
+
+    status = Column(Text, nullable=False, default="running")  # running / failed / completed
+    stage = Column(Text, nullable=True)  # last completed stage
+    completed_stages = Column(JSONB, nullable=False, default=list)
+    attempts = Column(Integer, nullable=False, default=1)
+    error = Column(Text, nullable=True)
+
+    topic = Column(JSONB, nullable=False)
+    links = Column(JSONB, nullable=True)
+    articles = Column(JSONB, nullable=True)
+    context = Column(Text, nullable=True)
+    article = Column(JSONB, nullable=True)
+    image_prompt = Column(JSONB, nullable=True)
+    image_url = Column(Text, nullable=True)
+    image_model = Column(Text, nullable=True)
+    category_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("categories.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+
+    article_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("articles.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+
+    created_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class PipelineJob(Base):
+    """
+    One pipeline stage of one run, claimed by workers with
+    SELECT ... FOR UPDATE SKIP LOCKED. A claimed job is invisible to other
+    workers until locked_until; if its worker dies it becomes claimable again.
+    """
+
+    __tablename__ = "pipeline_jobs"
+    __table_args__ = (
+        UniqueConstraint("run_id", "stage", name="uq_pipeline_jobs_run_stage"),
+        Index("ix_pipeline_jobs_claim", "status", "run_after"),
+    )
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+    )
+
+    run_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("pipeline_runs.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    stage = Column(Text, nullable=False)
+
+    status = Column(Text, nullable=False, default="queued")  # queued / running / done / dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    error = Column(Text, nullable=True)
+
+    run_after = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    locked_by = Column(Text, nullable=True)
+    locked_until = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    created_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class PipelineTrace(Base):
+    """Timing summary of one pipeline attempt (full spans go to OTLP/JSON)."""
+
+    __tablename__ = "pipeline_traces"
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+    )
+
+    run_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("pipeline_runs.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    trace_id = Column(Text, nullable=False)
+    status = Column(Text, nullable=False)  # ok / error
+    duration_ms = Column(Float, nullable=True)
+
+    stage_durations = Column(JSONB, nullable=False, default=dict)  # stage -> ms
+    providers = Column(JSONB, nullable=False, default=dict)  # stage -> provider
+    span_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True,
+    )
+
+
+class FeedState(Base):
+    """
+    Topics parsed from an RSS feed's last changed body, with that body's
+    ETag/Last-Modified: reused while the feed (served or revalidated by
+    the HTTP cache) still carries the same validators.
+    """
+
+    __tablename__ = "feed_states"
+
+    url = Column(Text, primary_key=True)
+    etag = Column(Text, nullable=True)
+    last_modified = Column(Text, nullable=True)
+    entries = Column(JSONB, nullable=False, default=list)
+
+    fetched_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class GNewsUrl(Base):
+    """Decoded Google News RSS link -> publisher URL (NULL: decoding failed)."""
+
+    __tablename__ = "gnews_urls"
+
+    gnews_url = Column(Text, primary_key=True)
+    publisher_url = Column(Text, nullable=True)
+
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    created_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+
+class ExtractionCache(Base):
+    """
+    Extracted publisher page keyed by sha256 of its canonical URL.
+    text NULL is a negative entry: extraction failed (see error).
+    """
+
+    __tablename__ = "extraction_cache"
+
+    url_hash = Column(Text, primary_key=True)
+    url = Column(Text, nullable=False)
+
+    title = Column(Text, nullable=True)
+    text = Column(Text, nullable=True)
+    authors = Column(JSONB, nullable=True)
+    publish_date = Column(TIMESTAMP(timezone=True), nullable=True)
+    error = Column(Text, nullable=True)
+
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    created_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+
+class DomainHealth(Base):
+    """
+    Extraction track record per publisher domain, shared by every
+    scheduler process. state is the circuit: closed (extract), open
+    (skip until opened_until) or half_open (one probe in flight until
+    opened_until).
+    """
+
+    __tablename__ = "domain_health"
+
+    domain = Column(Text, primary_key=True)
+    state = Column(Text, nullable=False, server_default="closed")
+
+    requests = Column(Integer, nullable=False, server_default="0")
+    timeouts = Column(Integer, nullable=False, server_default="0")
+    empties = Column(Integer, nullable=False, server_default="0")
+    errors = Column(Integer, nullable=False, server_default="0")
+    consecutive_failures = Column(Integer, nullable=False, server_default="0")
+    # Exponentially weighted: recent extractions count most
+    failure_rate = Column(Float, nullable=False, server_default="0")
+    latency_ms = Column(Float, nullable=True)
+
+    # Times the circuit opened in a row; each doubles the cooldown
+    trips = Column(Integer, nullable=False, server_default="0")
+    opened_until = Column(TIMESTAMP(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
 class NotificationTokenCreate(BaseModel):
     token: str
     platform: str
@@ -1,8 +1,26 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import Text, and_, any_, bindparam, desc, or_
+from sqlalchemy import text as sql_text
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from uuid import UUID
-
-from .models import Article, Category, NotificationToken
+from datetime import datetime, timedelta, timezone
+
+from .models import (
+    Article,
+    ArticleFingerprint,
+    Category,
+    DomainHealth,
+    ExtractionCache,
+    FeedState,
+    GNewsUrl,
+    NotificationToken,
+    PipelineJob,
+    PipelineRun,
+    PipelineTrace,
+)
+from app.services.image_variants import build_image_variants
+from app.services.simhash import simhash, to_signed
 from slugify import slugify
 from sqlalchemy import func
 
@@ -45,11 +63,40 @@ def save_article(
     )
 
     db.add(article)
+    db.flush()
+    db.add(_fingerprint(article))
     db.commit()
     db.refresh(article)
     return article
 
 
+def get_article_id_by_topic(db: Session, *, topic: str):
+    """Id of the article already saved for a topic, if any."""
+    row = db.query(Article.id).filter(Article.topic == topic).first()
+    return row.id if row else None
+
+
+def _fingerprint(article) -> ArticleFingerprint:
+    return ArticleFingerprint(
+        article_id=article.id,
+        topic_fp=to_signed(simhash(article.topic)),
+        title_fp=to_signed(simhash(article.title)),
+    )
+
+
+# ======================================================
+# RESPONSIVE IMAGE FIELDS
+# ======================================================
+
+
+def _image_fields(image_url: str | None) -> dict:
+    images = build_image_variants(image_url)
+    return {
+        "imageVariants": images["variants"] if images else None,
+        "imageSrcSet": images["srcset"] if images else None,
+    }
+
+
 # ======================================================
 # GET ARTICLES (Paginated + Topic joined)
 # ======================================================
@@ -83,6 +130,7 @@ def get_articles(
                 "summary": a.summary,
                 "content": a.content,
                 "imageUrl": a.image_url,
+                **_image_fields(a.image_url),
                 "views": a.views,
                 "createdAt": a.created_at,
                 "category": {
@@ -123,6 +171,7 @@ def get_article_by_slug(db: Session, *, slug: str):
         "summary": article.summary,
         "content": article.content,
         "imageUrl": article.image_url,
+        **_image_fields(article.image_url),
         "views": article.views,
         "createdAt": article.created_at,
         "category": {
@@ -150,14 +199,102 @@ def get_or_create_category(db: Session, *, name: str) -> Category:
         slug=slug,
     )
     db.add(category)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Created concurrently by another pipeline in the same batch
+        db.rollback()
+        return db.query(Category).filter(Category.slug == slug).one()
     db.refresh(category)
 
     return category
 
 
+def get_recent_fingerprints(db: Session, *, days: int = 30) -> list[tuple[str, int, int]]:
+    """
+    (topic, topic_fp, title_fp) for articles of the last `days` days.
+    Read-only: articles saved before fingerprints existed are fingerprinted
+    in memory (init_db.py stores theirs, see backfill_article_fingerprints).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = (
+        db.query(
+            Article.id,
+            Article.topic,
+            Article.title,
+            ArticleFingerprint.topic_fp,
+            ArticleFingerprint.title_fp,
+        )
+        .outerjoin(ArticleFingerprint, ArticleFingerprint.article_id == Article.id)
+        .filter(Article.created_at >= cutoff)
+        .all()
+    )
+
+    fingerprints = []
+    for row in rows:
+        if row.topic_fp is None:
+            fp = _fingerprint(row)
+            fingerprints.append((row.topic, fp.topic_fp, fp.title_fp))
+        else:
+            fingerprints.append((row.topic, row.topic_fp, row.title_fp))
+
+    return fingerprints
+
+
+def backfill_article_fingerprints(db: Session, *, batch_size: int = 500) -> int:
+    """
+    Stores fingerprints for articles that have none. ON CONFLICT DO NOTHING,
+    so concurrent runs (or a save_article racing it) cannot collide.
+    Returns the number of rows written.
+    """
+    written = 0
+    while True:
+        rows = (
+            db.query(Article.id, Article.topic, Article.title)
+            .outerjoin(ArticleFingerprint, ArticleFingerprint.article_id == Article.id)
+            .filter(ArticleFingerprint.article_id.is_(None))
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return written
+
+        values = [
+            {"article_id": fp.article_id, "topic_fp": fp.topic_fp, "title_fp": fp.title_fp}
+            for fp in map(_fingerprint, rows)
+        ]
+        db.execute(pg_insert(ArticleFingerprint).values(values).on_conflict_do_nothing())
+        db.commit()
+        written += len(values)
+
+
 def topic_exists(db, *, topic: str) -> bool:
-    return db.query(Article.id).filter(Article.topic == topic).first() is not None
+    return topic in existing_topics(db, [topic])
+
+
+def existing_topics(db: Session, titles: list[str]) -> set[str]:
+    """
+    Which of the titles are already taken, in one round trip: covered by
+    an article, or claimed by a pipeline run (whatever its status, since
+    create_pipeline_run refuses those too; failed runs are retried by
+    resume, not re-picked). = ANY(:titles) with the whole list as a
+    single array parameter, served by the unique indexes on
+    articles.topic and pipeline_runs (topic ->> 'title').
+    """
+    if not titles:
+        return set()
+
+    titles_param = bindparam("titles", value=list(titles), type_=ARRAY(Text))
+    run_title = PipelineRun.topic["title"].astext
+    rows = (
+        db.query(Article.topic.label("title"))
+        .filter(Article.topic == any_(titles_param))
+        .union(
+            db.query(run_title.label("title")).filter(run_title == any_(titles_param))
+        )
+        .all()
+    )
+    return {row.title for row in rows}
 
 
 def save_notification_token(db: Session, token: str, platform: str, device_id=None, browser=None):
@@ -194,4 +331,586 @@ def get_active_notification_tokens(db):
 
 def get_articles_for_sitemap(db: Session, page: int = 1, limit: int = 500):
     query = db.query(Article).order_by(Article.created_at.desc())
-    return query.offset((page - 1) * limit).limit(limit).all()
\ No newline at end of file
+    return query.offset((page - 1) * limit).limit(limit).all()
+
+
+# ======================================================
+# FEED STATES (conditional GET validators)
+# ======================================================
+
+
+def get_feed_states(db: Session, urls: list[str]) -> dict[str, FeedState]:
+    rows = db.query(FeedState).filter(FeedState.url.in_(urls)).all()
+    return {row.url: row for row in rows}
+
+
+def save_feed_state(
+    db: Session,
+    *,
+    url: str,
+    etag: str | None,
+    last_modified: str | None,
+    entries: list[dict] | None = None,
+):
+    """Upserts validators; entries=None (feed unchanged) keeps the stored entries."""
+    values = {"url": url, "etag": etag, "last_modified": last_modified}
+    if entries is not None:
+        values["entries"] = entries
+
+    update = {k: v for k, v in values.items() if k != "url"}
+    update["fetched_at"] = func.now()
+
+    stmt = pg_insert(FeedState).values(**{"entries": entries or [], **values})
+    db.execute(stmt.on_conflict_do_update(index_elements=["url"], set_=update))
+    db.commit()
+
+
+# ======================================================
+# GOOGLE NEWS URL CACHE
+# ======================================================
+
+
+def get_gnews_urls(db: Session, urls: list[str]) -> dict[str, str | None]:
+    """Unexpired decodes for the given links (None = known failure)."""
+    if not urls:
+        return {}
+
+    rows = (
+        db.query(GNewsUrl.gnews_url, GNewsUrl.publisher_url)
+        .filter(GNewsUrl.gnews_url.in_(urls), GNewsUrl.expires_at > func.now())
+        .all()
+    )
+    return {row.gnews_url: row.publisher_url for row in rows}
+
+
+def save_gnews_urls(
+    db: Session,
+    decoded: dict[str, str | None],
+    *,
+    ttl: timedelta,
+    failure_ttl: timedelta,
+):
+    if not decoded:
+        return
+
+    now = datetime.now(timezone.utc)
+    stmt = pg_insert(GNewsUrl).values(
+        [
+            {
+                "gnews_url": url,
+                "publisher_url": publisher_url,
+                "expires_at": now + (ttl if publisher_url else failure_ttl),
+            }
+            for url, publisher_url in decoded.items()
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["gnews_url"],
+            set_={
+                "publisher_url": stmt.excluded.publisher_url,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        )
+    )
+    db.commit()
+
+
+# ======================================================
+# EXTRACTION CACHE
+# ======================================================
+
+
+def get_extractions(db: Session, url_hashes: list[str]) -> dict[str, dict | None]:
+    """
+    Unexpired extractions by URL hash: the article dict, or None for a
+    known failure.
+    """
+    if not url_hashes:
+        return {}
+
+    rows = (
+        db.query(ExtractionCache)
+        .filter(
+            ExtractionCache.url_hash.in_(url_hashes),
+            ExtractionCache.expires_at > func.now(),
+        )
+        .all()
+    )
+    return {
+        row.url_hash: (
+            {
+                "url": row.url,
+                "title": row.title,
+                "text": row.text,
+                "authors": row.authors or [],
+                "publish_date": row.publish_date,
+            }
+            if row.text is not None
+            else None
+        )
+        for row in rows
+    }
+
+
+def save_extractions(
+    db: Session,
+    results: dict[str, tuple[str, dict | None, str | None]],
+    *,
+    ttl: timedelta,
+    failure_ttl: timedelta,
+):
+    """results: url_hash -> (url, article, None) or (url, None, error message)."""
+    if not results:
+        return
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for key, (url, article, error) in results.items():
+        article = article or {}
+        rows.append(
+            {
+                "url_hash": key,
+                "url": url,
+                "title": article.get("title"),
+                "text": article.get("text"),
+                "authors": article.get("authors"),
+                "publish_date": article.get("publish_date"),
+                "error": error,
+                "expires_at": now + (ttl if article else failure_ttl),
+            }
+        )
+
+    stmt = pg_insert(ExtractionCache).values(rows)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["url_hash"],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "url",
+                    "title",
+                    "text",
+                    "authors",
+                    "publish_date",
+                    "error",
+                    "expires_at",
+                )
+            },
+        )
+    )
+    db.commit()
+
+
+# ======================================================
+# DOMAIN HEALTH (extraction circuit breaker)
+# ======================================================
+
+
+def get_domain_health(
+    db: Session, domains, *, for_update: bool = False
+) -> dict[str, DomainHealth]:
+    if not domains:
+        return {}
+
+    query = (
+        db.query(DomainHealth)
+        .filter(DomainHealth.domain.in_(list(domains)))
+        # Fixed lock order so concurrent writers cannot deadlock
+        .order_by(DomainHealth.domain)
+    )
+    if for_update:
+        query = query.with_for_update()
+    return {row.domain: row for row in query.all()}
+
+
+def ensure_domain_health(db: Session, rows: list[dict]):
+    """Inserts missing domains (existing ones are left untouched)."""
+    if not rows:
+        return
+
+    db.execute(
+        pg_insert(DomainHealth).values(rows).on_conflict_do_nothing(
+            index_elements=["domain"]
+        )
+    )
+    db.commit()
+
+
+def claim_domain_probe(db: Session, domain: str, *, lease: timedelta) -> bool:
+    """
+    Moves an open circuit whose cooldown is over (or a half-open one whose
+    probe lease expired) to half_open. Exactly one caller wins.
+    """
+    claimed = (
+        db.query(DomainHealth)
+        .filter(
+            DomainHealth.domain == domain,
+            DomainHealth.state.in_(["open", "half_open"]),
+            DomainHealth.opened_until <= func.now(),
+        )
+        .update(
+            {
+                DomainHealth.state: "half_open",
+                DomainHealth.opened_until: datetime.now(timezone.utc) + lease,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def release_domain_probe(db: Session, domain: str, *, opened_until: datetime) -> bool:
+    """
+    Hands back a half-open probe that never ran: the circuit is open again
+    with its previous cooldown end, so the next batch may probe at once.
+    """
+    released = (
+        db.query(DomainHealth)
+        .filter(DomainHealth.domain == domain, DomainHealth.state == "half_open")
+        .update(
+            {DomainHealth.state: "open", DomainHealth.opened_until: opened_until},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return released == 1
+
+
+# ======================================================
+# PIPELINE RUNS (stage checkpoints)
+# ======================================================
+
+
+def create_pipeline_run(db: Session, *, topic: dict) -> PipelineRun | None:
+    """
+    Claims a topic and opens a run for it. Returns None when the topic is
+    already covered or is being claimed by another process at this moment.
+    """
+    title = topic.get("title") or ""
+
+    # Transaction-scoped advisory lock: concurrent schedulers/workers racing
+    # for the same title serialize here; released by the commit below.
+    locked = db.execute(
+        sql_text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"),
+        {"key": f"topic:{title}"},
+    ).scalar()
+    if not locked:
+        db.rollback()
+        return None
+
+    taken = (
+        db.query(PipelineRun.id).filter(PipelineRun.topic["title"].astext == title).first()
+        or db.query(Article.id).filter(Article.topic == title).first()
+    )
+    if taken:
+        db.rollback()
+        return None
+
+    run = PipelineRun(
+        topic=topic,
+        stage="topic",
+        completed_stages=["topic"],
+        status="running",
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def get_pipeline_run(db: Session, run_id) -> PipelineRun | None:
+    return db.query(PipelineRun).filter(PipelineRun.id == run_id).first()
+
+
+def save_pipeline_stage(db: Session, run: PipelineRun, stage: str, **outputs) -> PipelineRun:
+    for field, value in outputs.items():
+        setattr(run, field, value)
+    run.stage = stage
+    # Reassign (not append) so SQLAlchemy sees the JSONB change
+    run.completed_stages = [*(run.completed_stages or []), stage]
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def fail_pipeline_run(db: Session, run: PipelineRun, error: str):
+    db.rollback()
+    run.status = "failed"
+    run.error = error[:2000]
+    db.commit()
+
+
+def complete_pipeline_run(db: Session, run: PipelineRun):
+    run.status = "completed"
+    run.error = None
+    db.commit()
+
+
+def get_resumable_pipeline_runs(
+    db: Session,
+    *,
+    limit: int,
+    max_attempts: int = 3,
+    max_age_hours: int = 48,
+) -> list[PipelineRun]:
+    """Failed runs worth resuming, newest first."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+    return (
+        db.query(PipelineRun)
+        .filter(
+            PipelineRun.status == "failed",
+            PipelineRun.attempts < max_attempts,
+            PipelineRun.created_at >= cutoff,
+        )
+        .order_by(PipelineRun.updated_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def restart_pipeline_run(db: Session, run: PipelineRun) -> PipelineRun:
+    run.status = "running"
+    run.attempts += 1
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def save_pipeline_trace(db: Session, *, run_id, summary: dict) -> PipelineTrace:
+    row = PipelineTrace(
+        run_id=run_id,
+        trace_id=summary["trace_id"],
+        status=summary["status"],
+        duration_ms=summary["duration_ms"],
+        stage_durations=summary["stages"],
+        providers=summary["providers"],
+        span_count=summary["span_count"],
+    )
+    db.add(row)
+    db.commit()
+    return row
+
+
+# ======================================================
+# PIPELINE JOBS (work queue)
+# ======================================================
+
+
+def _ready_stages(graph: dict[str, tuple[str, ...]], completed) -> list[str]:
+    completed = set(completed or [])
+    return [
+        stage
+        for stage, deps in graph.items()
+        if stage not in completed and completed.issuperset(deps)
+    ]
+
+
+def _enqueue_jobs(db: Session, run_id, stages: list[str], *, max_attempts: int):
+    if not stages:
+        return
+
+    stmt = pg_insert(PipelineJob).values(
+        [
+            {
+                "run_id": run_id,
+                "stage": stage,
+                "status": "queued",
+                "attempts": 0,
+                "max_attempts": max_attempts,
+            }
+            for stage in stages
+        ]
+    )
+    # Queued/running/done jobs are left alone; a dead one is revived
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_pipeline_jobs_run_stage",
+        set_={
+            "status": "queued",
+            "attempts": 0,
+            "error": None,
+            "run_after": func.now(),
+            "locked_by": None,
+            "locked_until": None,
+        },
+        where=PipelineJob.__table__.c.status == "dead",
+    )
+    db.execute(stmt)
+
+
+def enqueue_pipeline_run(
+    db: Session,
+    run: PipelineRun,
+    *,
+    graph: dict[str, tuple[str, ...]],
+    max_attempts: int = 3,
+):
+    """Queues every stage of the run whose dependencies are checkpointed."""
+    _enqueue_jobs(
+        db, run.id, _ready_stages(graph, run.completed_stages), max_attempts=max_attempts
+    )
+    db.commit()
+
+
+def _bury_pipeline_job(db: Session, job: PipelineJob, error: str):
+    job.status = "dead"
+    job.error = error[:2000]
+    job.locked_by = None
+    job.locked_until = None
+
+    run = db.query(PipelineRun).filter(PipelineRun.id == job.run_id).with_for_update().one()
+    run.status = "failed"
+    run.error = f"{job.stage}: {error}"[:2000]
+    db.commit()
+
+
+def claim_pipeline_job(
+    db: Session,
+    *,
+    worker_id: str,
+    leases: dict[str, float],
+    default_lease: float = 600,
+) -> PipelineJob | None:
+    """
+    Claims the oldest runnable job: queued and due, or running with an
+    expired lease (its worker died). SKIP LOCKED lets any number of workers
+    poll at once without blocking on, or double-claiming, a row.
+    """
+    while True:
+        job = (
+            db.query(PipelineJob)
+            .filter(
+                or_(
+                    and_(PipelineJob.status == "queued", PipelineJob.run_after <= func.now()),
+                    and_(PipelineJob.status == "running", PipelineJob.locked_until < func.now()),
+                )
+            )
+            .order_by(PipelineJob.run_after)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.rollback()
+            return None
+
+        if job.attempts >= job.max_attempts:
+            # Lease expired on the final attempt
+            _bury_pipeline_job(db, job, job.error or "lease expired (worker lost)")
+            continue
+
+        job.status = "running"
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_until = func.now() + timedelta(
+            seconds=leases.get(job.stage, default_lease)
+        )
+        db.commit()
+        db.refresh(job)
+        return job
+
+
+def renew_pipeline_job_lease(db: Session, job_id, *, worker_id: str, lease: float) -> bool:
+    """
+    Heartbeat: pushes a running job's lease out by `lease` seconds. False
+    if the job is no longer this worker's (lease already lost).
+    """
+    renewed = (
+        db.query(PipelineJob)
+        .filter(
+            PipelineJob.id == job_id,
+            PipelineJob.status == "running",
+            PipelineJob.locked_by == worker_id,
+        )
+        .update(
+            {PipelineJob.locked_until: func.now() + timedelta(seconds=lease)},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return renewed == 1
+
+
+def complete_pipeline_job(
+    db: Session,
+    job: PipelineJob,
+    *,
+    worker_id: str,
+    outputs: dict,
+    graph: dict[str, tuple[str, ...]],
+) -> PipelineRun | None:
+    """
+    Checkpoints a finished stage and queues the stages it unblocked, in one
+    transaction. The run row is locked so sibling stages finishing at the
+    same moment cannot overwrite each other's completed_stages.
+
+    Returns None (and discards the result) if the lease was lost meanwhile.
+    """
+    db.refresh(job, with_for_update=True)
+    if job.status != "running" or job.locked_by != worker_id:
+        db.rollback()
+        return None
+
+    run = db.query(PipelineRun).filter(PipelineRun.id == job.run_id).with_for_update().one()
+    for field, value in outputs.items():
+        setattr(run, field, value)
+    run.stage = job.stage
+    if job.stage not in (run.completed_stages or []):
+        # Reassign (not append) so SQLAlchemy sees the JSONB change
+        run.completed_stages = [*(run.completed_stages or []), job.stage]
+
+    job.status = "done"
+    job.error = None
+    job.locked_by = None
+    job.locked_until = None
+
+    if all(stage in run.completed_stages for stage in graph):
+        run.status = "completed"
+        run.error = None
+    else:
+        _enqueue_jobs(
+            db,
+            run.id,
+            _ready_stages(graph, run.completed_stages),
+            max_attempts=job.max_attempts,
+        )
+
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def fail_pipeline_job(
+    db: Session,
+    job: PipelineJob,
+    error: str,
+    *,
+    worker_id: str,
+    backoff_seconds: float = 30,
+) -> bool | None:
+    """
+    Requeues the job with exponential backoff, or marks it dead (and its run
+    failed) once max_attempts is used up. Returns True if it will be retried,
+    False if it is dead, and None (changing nothing) if the lease was lost
+    and another worker owns the job now.
+    """
+    db.rollback()
+
+    db.refresh(job, with_for_update=True)
+    if job.status != "running" or job.locked_by != worker_id:
+        db.rollback()
+        return None
+
+    if job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.error = error[:2000]
+        job.locked_by = None
+        job.locked_until = None
+        job.run_after = func.now() + timedelta(
+            seconds=backoff_seconds * 2 ** (job.attempts - 1)
+        )
+        db.commit()
+        return True
+
+    _bury_pipeline_job(db, job, error)
+    return False
@@ -0,0 +1,179 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+# =========================
+# CONFIG
+# =========================
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+# EXPLAIN ANALYZE re-runs the statement, so it is off by default
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "0") == "1"
+
+logger = logging.getLogger(__name__)
+
+MAX_PARAMS_LEN = 500
+MAX_EXPLAINED_STATEMENTS = 1000
+
+_entries: deque[dict] = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+_explained: set[str] = set()
+_lock = threading.Lock()
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+# Row-locking SELECTs (e.g. the job queue's FOR UPDATE SKIP LOCKED claim)
+_LOCKING_RE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+
+# =========================
+# HELPERS
+# =========================
+def normalize_statement(statement: str) -> str:
+    """
+    Collapses literals and bind parameters so that statements differing
+    only in values share one key, e.g. `... LIMIT 50 OFFSET 100` and
+    `... LIMIT 50 OFFSET 150`.
+    """
+    sql = _WHITESPACE_RE.sub(" ", statement).strip()
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(?)", sql)
+    return sql
+
+
+def _origin() -> str:
+    """
+    Returns the repository function that issued the statement, falling back
+    to the nearest app frame (routes, agents) outside SQLAlchemy.
+    """
+    frame = sys._getframe(2)
+    fallback = None
+
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace("\\", "/")
+        if filename.endswith("/db/repository.py"):
+            return frame.f_code.co_name
+
+        if (
+            fallback is None
+            and "/app/" in filename
+            and "site-packages" not in filename
+            and not filename.endswith(("/slow_query_log.py", "/metrics.py"))
+        ):
+            fallback = f"{os.path.basename(filename)}:{frame.f_code.co_name}"
+
+        frame = frame.f_back
+
+    return fallback or "unknown"
+
+
+def _explain(cursor, statement: str, parameters) -> str | None:
+    """
+    Runs EXPLAIN on the same DBAPI connection inside a savepoint, so a
+    failing EXPLAIN cannot abort the caller's transaction. ANALYZE executes
+    the statement again, so only plain SELECTs get (ANALYZE, BUFFERS);
+    anything else, including row-locking SELECTs, gets the estimated plan.
+    """
+    analyze = statement.lstrip()[:6].upper() == "SELECT" and not _LOCKING_RE.search(statement)
+    options = "(ANALYZE, BUFFERS) " if analyze else ""
+
+    dbapi_conn = cursor.connection
+    explain_cursor = dbapi_conn.cursor()
+
+    try:
+        explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute(f"EXPLAIN {options}{statement}", parameters)
+            plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+        except Exception as e:
+            explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"[EXPLAIN failed] {e}"
+        explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+
+    except Exception as e:
+        logger.warning("EXPLAIN error: %s", e)
+        return None
+
+    finally:
+        explain_cursor.close()
+
+
+# =========================
+# RING BUFFER
+# =========================
+def get_slow_queries(limit: int | None = None) -> list[dict]:
+    """Newest first."""
+    with _lock:
+        entries = list(_entries)
+    entries.reverse()
+    return entries[:limit] if limit else entries
+
+
+def clear_slow_queries():
+    with _lock:
+        _entries.clear()
+
+
+# =========================
+# SQLALCHEMY HOOKS
+# =========================
+def install_slow_query_log(engine):
+    """
+    Records every statement slower than SLOW_QUERY_MS into a bounded ring
+    buffer. With SLOW_QUERY_EXPLAIN=1 the first occurrence of each
+    normalized SELECT also gets its plan (see _explain).
+    """
+
+    # Kept on the execution context so a failed statement leaves nothing behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - context._slow_query_start) * 1000
+        if elapsed_ms < SLOW_QUERY_MS:
+            return
+
+        normalized = normalize_statement(statement)
+
+        plan = None
+        if (
+            SLOW_QUERY_EXPLAIN
+            and not executemany
+            and normalized[:6].upper() == "SELECT"
+        ):
+            with _lock:
+                first_seen = (
+                    normalized not in _explained
+                    and len(_explained) < MAX_EXPLAINED_STATEMENTS
+                )
+                if first_seen:
+                    _explained.add(normalized)
+            if first_seen:
+                plan = _explain(cursor, statement, parameters)
+
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "durationMs": round(elapsed_ms, 2),
+            "origin": _origin(),
+            "statement": statement,
+            "normalized": normalized,
+            "parameters": repr(parameters)[:MAX_PARAMS_LEN],
+            "explain": plan,
+        }
+
+        with _lock:
+            _entries.append(entry)
@@ -1,5 +1,24 @@
-from app.db.database import engine
+from app.db.database import SessionLocal, engine
 from app.db.models import Base
+from app.db.repository import backfill_article_fingerprints
 
+# Idempotent, so it runs before every scheduler run: creates missing
+# tables, and indexes added to tables that already exist (create_all
+# alone skips those). Column changes to existing tables still need an
+# ALTER TABLE.
 Base.metadata.create_all(bind=engine)
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+# Near-duplicate detection reads fingerprints of articles saved before
+# the article_fingerprints table existed
+db = SessionLocal()
+try:
+    backfilled = backfill_article_fingerprints(db)
+    if backfilled:
+        print(f"🧬 Fingerprinted {backfilled} existing article(s)")
+finally:
+    db.close()
+
 print("Database initialized")
@@ -6,18 +6,29 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
-from app.routes import sitemap
+from app.routes import sitemap, metrics, admin
 
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, engine
 from app.db.models import NotificationTokenCreate
+from app.db.slow_query_log import install_slow_query_log
 from app.db.repository import (
     get_categories,
     get_articles,
     get_article_by_slug,
     save_notification_token,
 )
+from app.services import http_client
+from app.services.metrics import MetricsMiddleware, instrument_engine
+from app.services.profiler import (
+    ProfiledRoute,
+    ProfilerMiddleware,
+    TimedJSONResponse,
+    server_timing,
+)
 
-app = FastAPI(title="HotOnNet API")
+app = FastAPI(title="HotOnNet API", default_response_class=TimedJSONResponse)
+# Lets the profiler sample the threadpool worker running each endpoint
+app.router.route_class = ProfiledRoute
 
 # =========================
 # FRONTEND BUILD (OPTIONAL)
@@ -46,7 +57,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# =========================
+# PROFILING + METRICS
+# =========================
+# Opt-in sampling profiler (PROFILE_SAMPLE_RATE / signed X-Profile header)
+app.add_middleware(ProfilerMiddleware)
+
+# Added last so it wraps everything, including CORS preflights.
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+install_slow_query_log(engine)
+
 app.include_router(sitemap.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await http_client.aclose()
 
 
 # =========================
@@ -177,8 +206,10 @@ def article_share(
             else "Read the latest story on HotOnNet."
         )
 
+        og_variant = (article.get("imageVariants") or {}).get("og") or {}
         image = (
-            article.get("imageUrl")
+            og_variant.get("jpg")
+            or article.get("imageUrl")
             or article.get("image_url")
             or article.get("image")
             or DEFAULT_OG_IMAGE
@@ -187,8 +218,8 @@ def article_share(
         if isinstance(image, str) and image.startswith("/"):
             image = f"{PUBLIC_SITE_URL}{image}"
 
-        return HTMLResponse(
-            f"""<!doctype html>
+        with server_timing("render"):
+            page = f"""<!doctype html>
 <html lang="en">
 <head>
   <meta charset="utf-8" />
@@ -210,15 +241,21 @@ def article_share(
   <meta name="twitter:image" content="{image}" />
 </head>
 <body></body>
-</html>""",
+</html>"""
+
+        return HTMLResponse(
+            page,
             headers={"Cache-Control": "public, max-age=600"},
         )
 
     # Search engines → serve SPA HTML if exists
     if is_search_engine_bot(user_agent):
         if INDEX_HTML.exists():
+            with server_timing("render"):
+                page = INDEX_HTML.read_text(encoding="utf-8")
+
             return HTMLResponse(
-                INDEX_HTML.read_text(encoding="utf-8"),
+                page,
                 headers={"Cache-Control": "public, max-age=300"},
             )
 
@@ -0,0 +1,46 @@
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from app.db.slow_query_log import (
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_MS,
+    clear_slow_queries,
+    get_slow_queries,
+)
+from app.services.profiler import ProfiledRoute
+
+router = APIRouter(prefix="/admin", include_in_schema=False, route_class=ProfiledRoute)
+
+# === CONFIG ===
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+# === AUTH DEPENDENCY ===
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    # Admin endpoints do not exist unless a token is configured
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+# ======================================================
+# SLOW QUERY LOG
+# URL: /admin/slow-queries
+# ======================================================
+@router.get("/slow-queries", dependencies=[Depends(require_admin)])
+def slow_queries(limit: int = Query(default=50, ge=1, le=1000)):
+    return {
+        "thresholdMs": SLOW_QUERY_MS,
+        "explain": SLOW_QUERY_EXPLAIN,
+        "items": get_slow_queries(limit),
+    }
+
+
+@router.delete("/slow-queries", dependencies=[Depends(require_admin)])
+def reset_slow_queries():
+    clear_slow_queries()
+    return {"message": "Slow query log cleared"}
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from app.services.metrics import render_metrics
+from app.services.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+# ======================================================
+# PROMETHEUS METRICS
+# URL: /metrics
+# ======================================================
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
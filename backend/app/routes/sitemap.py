@@ -5,8 +5,9 @@ from xml.sax.saxutils import escape
 
 from app.db.database import SessionLocal
 from app.db.repository import get_articles_for_sitemap
+from app.services.profiler import ProfiledRoute, server_timing
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 # === CONFIG ===
 SITE_URL = "https://hotonnet.com"
@@ -70,35 +71,10 @@ def sitemap(db: Session = Depends(get_db)):
         articles.extend(batch)
         page += 1
 
-    xml = ['<?xml version="1.0" encoding="UTF-8"?>']
-    xml.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
-
-    for article in articles:
-        if not article.slug:
-            continue
-
-        created_at = to_utc(getattr(article, "created_at", None))
-        published_at = to_utc(getattr(article, "published_at", None))
-
-        # lastmod should be a valid datetime
-        lastmod_dt = published_at or created_at
-        if not lastmod_dt:
-            continue
-
-        xml.append(
-            f"""
-  <url>
-    <loc>{SITE_URL}/article/{escape(str(article.slug))}</loc>
-    <lastmod>{lastmod_dt.isoformat()}</lastmod>
-    <changefreq>daily</changefreq>
-    <priority>0.8</priority>
-  </url>
-        """.strip()
-        )
-
-    xml.append("</urlset>")
+    with server_timing("render"):
+        xml = _render_sitemap(articles)
 
-    return Response("\n".join(xml), media_type="application/xml")
+    return Response(xml, media_type="application/xml")
 
 
 # ======================================================
@@ -141,6 +117,46 @@ def news_sitemap(db: Session = Depends(get_db)):
 
         page += 1
 
+    with server_timing("render"):
+        xml = _render_news_sitemap(recent_articles)
+
+    return Response(xml, media_type="application/xml")
+
+
+# === XML RENDERING ===
+def _render_sitemap(articles) -> str:
+    xml = ['<?xml version="1.0" encoding="UTF-8"?>']
+    xml.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+
+    for article in articles:
+        if not article.slug:
+            continue
+
+        created_at = to_utc(getattr(article, "created_at", None))
+        published_at = to_utc(getattr(article, "published_at", None))
+
+        # lastmod should be a valid datetime
+        lastmod_dt = published_at or created_at
+        if not lastmod_dt:
+            continue
+
+        xml.append(
+            f"""
+  <url>
+    <loc>{SITE_URL}/article/{escape(str(article.slug))}</loc>
+    <lastmod>{lastmod_dt.isoformat()}</lastmod>
+    <changefreq>daily</changefreq>
+    <priority>0.8</priority>
+  </url>
+        """.strip()
+        )
+
+    xml.append("</urlset>")
+
+    return "\n".join(xml)
+
+
+def _render_news_sitemap(recent_articles) -> str:
     xml = ['<?xml version="1.0" encoding="UTF-8"?>']
     xml.append(
         '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
@@ -174,4 +190,4 @@ def news_sitemap(db: Session = Depends(get_db)):
 
     xml.append("</urlset>")
 
-    return Response("\n".join(xml), media_type="application/xml")
+    return "\n".join(xml)
@@ -1,3 +1,12 @@
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from slugify import slugify
 from dotenv import load_dotenv
 
@@ -12,120 +21,301 @@ from agents.x_poster_agent import XPosterAgent
 
 from app.services.fcm_service import send_push_to_tokens
 from app.services.url_indexing_service import submit_url_to_bing
+from app.services.dag_executor import Stage, run_dag
+from app.services.tracing import (
+    export_trace,
+    set_attribute,
+    span,
+    start_trace,
+    summarize,
+)
 from app.db.database import SessionLocal
 from app.db.repository import (
     get_active_notification_tokens,
+    get_article_id_by_topic,
     save_article,
     get_or_create_category,
+    create_pipeline_run,
+    get_pipeline_run,
+    save_pipeline_stage,
+    save_pipeline_trace,
+    fail_pipeline_run,
+    complete_pipeline_run,
+    get_resumable_pipeline_runs,
+    restart_pipeline_run,
+    enqueue_pipeline_run,
+    claim_pipeline_job,
+    complete_pipeline_job,
+    fail_pipeline_job,
+    renew_pipeline_job_lease,
 )
 
 load_dotenv()
 
+# =========================
+# BATCH CONCURRENCY
+# =========================
+# Upper bound on pipelines in flight at once
+MAX_PARALLEL_ARTICLES = int(os.getenv("MAX_PARALLEL_ARTICLES", "4"))
 
-def run():
-    db = SessionLocal()
+# Per-stage limits shared by every pipeline in a batch, so N articles do not
+# mean N simultaneous LLM calls or image generations (provider rate limits).
+STAGE_LIMITS = {
+    "search": int(os.getenv("SEARCH_CONCURRENCY", "3")),
+    "extraction": int(os.getenv("EXTRACTION_CONCURRENCY", "2")),
+    "llm": int(os.getenv("LLM_CONCURRENCY", "2")),
+    "image": int(os.getenv("IMAGE_CONCURRENCY", "1")),
+}
+STAGE_SLOTS = {
+    stage: threading.BoundedSemaphore(limit) for stage, limit in STAGE_LIMITS.items()
+}
 
-    try:
-        # =========================
-        # 1️⃣ Pick TOPIC (idea)
-        # =========================
-        topic_data = TopicAgent(db).run()
 
-        topic = topic_data.get("title")
-        if not topic:
-            raise RuntimeError(f"Invalid topic_data returned: {topic_data}")
+@contextmanager
+def _slot(kind: str):
+    """Holds a shared stage slot, recording how long we queued for it."""
+    start = time.perf_counter()
+    with STAGE_SLOTS[kind]:
+        set_attribute("slot_wait_ms", round((time.perf_counter() - start) * 1000, 1))
+        yield
 
-        print("Topic idea:", topic_data)
 
-        # =========================
-        # 2️⃣ Discover links
-        # =========================
-        links = search_news(topic, limit=5)
-        if not links:
-            raise RuntimeError("No news links found")
+# =========================
+# PIPELINE GRAPH
+# =========================
+# Per-stage timeouts (seconds). Image covers three providers with retries.
+STAGE_TIMEOUTS = {
+    "links": 60,
+    "articles": 90,
+    "context": 10,
+    "article": 240,
+    "category": 30,
+    "image_prompt": 60,
+    "image": 600,
+    "saved": 30,
+    "tweeted": 120,
+    "notified": 60,
+    "indexed": 30,
+}
 
-        # =========================
-        # 3️⃣ Extract context
-        # =========================
-        articles = extract_articles_parallel(links, max_workers=5)
+# Stages that publish something. run_dag cannot kill a timed-out stage,
+# so one abandoned mid-call could still post after the run is marked
+# failed, and resume would post again. They run without a DAG timeout
+# (their providers have HTTP timeouts of their own); STAGE_TIMEOUTS still
+# sizes their job leases, which the worker heartbeat keeps renewing.
+SIDE_EFFECT_STAGES = {"saved", "tweeted", "notified", "indexed"}
+
+# Threads per pipeline; the widest fan-out is tweet + push + Bing
+PIPELINE_WORKERS = 3
+
+# stage -> stages it waits for ("topic" is done when the run is created)
+PIPELINE_GRAPH = {
+    "links": (),
+    "articles": ("links",),
+    "context": ("links", "articles"),
+    "article": ("context",),
+    "category": ("article",),
+    "image_prompt": ("article",),
+    "image": ("image_prompt",),
+    "saved": ("article", "category", "image"),
+    "tweeted": ("saved",),
+    "notified": ("saved",),
+    "indexed": ("saved",),
+}
+
+
+def _jsonable_articles(articles: list[dict]) -> list[dict]:
+    return [
+        {
+            **a,
+            "publish_date": a["publish_date"].isoformat() if a.get("publish_date") else None,
+        }
+        for a in articles
+    ]
+
+
+def _short_summary(summary: str) -> str:
+    short_summary = summary.strip()
+    if len(short_summary) > 120:
+        short_summary = short_summary[:110] + "..."
+    return short_summary
 
-        if articles:
-            context = build_context(articles)
-        else:
-            print("⚠️ No full articles extracted. Falling back to headlines.")
-            context = build_fallback_context(links)
 
-        # =========================
-        # 4️⃣ Write article + CATEGORY
-        # =========================
-        article = WriterAgent().run(topic, context)
+def _checkpointed_results(run) -> dict:
+    """Results of stages a previous attempt already completed."""
+    outputs = {
+        "topic": run.topic,
+        "links": run.links,
+        "articles": run.articles,
+        "context": run.context,
+        "article": run.article,
+        "image_prompt": run.image_prompt,
+        "category": run.category_id,
+        "image": (run.image_url, run.image_model),
+        "saved": run.article_id,
+    }
+    return {stage: outputs.get(stage) for stage in run.completed_stages or []}
 
-        title = article["title"]
+
+# Stage result -> pipeline_runs columns
+CHECKPOINT_FIELDS = {
+    "links": lambda links: {"links": links},
+    "articles": lambda articles: {"articles": _jsonable_articles(articles)},
+    "context": lambda context: {"context": context},
+    "article": lambda article: {"article": article},
+    "category": lambda category_id: {"category_id": category_id},
+    "image_prompt": lambda prompt: {"image_prompt": prompt},
+    "image": lambda image: {"image_url": image[0], "image_model": image[1]},
+    "saved": lambda article_id: {"article_id": article_id},
+    "tweeted": lambda _: {},
+    "notified": lambda _: {},
+    "indexed": lambda _: {},
+}
+
+
+def _build_stages(topic: str) -> list[Stage]:
+    """
+    topic → links → articles → context → article ─┬─ category ──────────────┐
+                                                   └─ image_prompt → image ─┴─ saved ─┬─ tweeted
+                                                                                      ├─ notified
+                                                                                      └─ indexed
+    """
+
+    def article_fields(r: dict) -> tuple[str, str, str, str]:
+        article = r["article"]
         content = article["body"]
         summary = article.get("summary") or content[:200]
-        category_name = article["category"]
-        slug = slugify(title)
-
-        # =========================
-        # 5️⃣ Get or create CATEGORY
-        # =========================
-        category = get_or_create_category(db, name=category_name)
-
-        # =========================
-        # 6️⃣ Generate image prompt
-        # =========================
-        prompt_data = ImagePromptAgent().run(
-            topic=title,  # ✅ better than summary
-            category=category_name,
-        )
+        return article["title"], content, summary, slugify(article["title"])
 
-        # =========================
-        # 7️⃣ Generate image
-        # =========================
-        image_url, model = ImageAgent().run(
-            prompt=prompt_data["prompt"],
-            negative_prompt=prompt_data["negative_prompt"],
-            topic=topic,
-            humans_allowed=prompt_data["humans_allowed"],
-        )
+    # =========================
+    # 2️⃣ Discover links
+    # =========================
+    def links(r):
+        with _slot("search"):
+            found = search_news(topic, limit=5)
+        if not found:
+            raise RuntimeError("No news links found")
+        return found
 
-        # =========================
-        # 8️⃣ Save article
-        # =========================
-        save_article(
-            db=db,
-            topic=topic,
-            title=title,
-            slug=slug,
-            summary=summary,
-            content=content,
-            category_id=category.id,
-            image_url=image_url,
-            image_model=model,
-        )
+    # =========================
+    # 3️⃣ Extract context
+    # =========================
+    def articles(r):
+        with _slot("extraction"):
+            return extract_articles_parallel(r["links"], max_workers=5)
+
+    def context(r):
+        if r["articles"]:
+            return build_context(r["articles"])
+        print("⚠️ No full articles extracted. Falling back to headlines.")
+        return build_fallback_context(r["links"])
+
+    # =========================
+    # 4️⃣ Write article + CATEGORY
+    # =========================
+    def article(r):
+        with _slot("llm"):
+            written = WriterAgent().run(topic, r["context"])
+        set_attribute("provider", written.get("provider", "unknown"))
+        return written
+
+    # =========================
+    # 5️⃣ Get or create CATEGORY
+    # =========================
+    def category(r):
+        db = SessionLocal()
+        try:
+            return get_or_create_category(db, name=r["article"]["category"]).id
+        finally:
+            db.close()
 
-        print(f"✅ Article saved | topic='{topic}' | category='{category_name}'")
+    # =========================
+    # 6️⃣ Generate image prompt (needs only title + category)
+    # =========================
+    def image_prompt(r):
+        with _slot("llm"):
+            prompt_data = ImagePromptAgent().run(
+                topic=r["article"]["title"],  # ✅ better than summary
+                category=r["article"]["category"],
+            )
+        set_attribute("provider", prompt_data.get("provider", "unknown"))
+        return prompt_data
 
-        # =========================
-        # 9️⃣ Post to X
-        # =========================
-        tweet_id = XPosterAgent().post_article_with_image_url(summary, slug, image_url)
+    # =========================
+    # 7️⃣ Generate image
+    # =========================
+    def image(r):
+        prompt_data = r["image_prompt"]
+        with _slot("image"):
+            image_url, model = ImageAgent().run(
+                prompt=prompt_data["prompt"],
+                negative_prompt=prompt_data["negative_prompt"],
+                topic=topic,
+                humans_allowed=prompt_data["humans_allowed"],
+            )
+        set_attribute("provider", model)
+        return image_url, model
+
+    # =========================
+    # 8️⃣ Save article
+    # =========================
+    def saved(r):
+        title, content, summary, slug = article_fields(r)
+        image_url, model = r["image"]
+
+        db = SessionLocal()
+        try:
+            # A retried save finds the article the previous attempt committed
+            existing_id = get_article_id_by_topic(db, topic=topic)
+            if existing_id is not None:
+                print(f"♻️ Article already saved | topic='{topic}'")
+                return existing_id
+
+            row = save_article(
+                db=db,
+                topic=topic,
+                title=title,
+                slug=slug,
+                summary=summary,
+                content=content,
+                category_id=r["category"],
+                image_url=image_url,
+                image_model=model,
+            )
+        finally:
+            db.close()
+
+        print(f"✅ Article saved | topic='{topic}' | category='{r['article']['category']}'")
+        return row.id
+
+    # =========================
+    # 9️⃣ Fan-out: X, push, Bing
+    # =========================
+    def tweeted(r):
+        _, _, summary, slug = article_fields(r)
+        tweet_id = XPosterAgent().post_article_with_image_url(summary, slug, r["image"][0])
         if tweet_id:
             print("✅ Tweet posted | tweet_id =", tweet_id)
         else:
             print("⚠️ Tweet may have failed or returned None")
+        return tweet_id
+
+    def notified(r):
+        title, _, summary, slug = article_fields(r)
+        image_url = r["image"][0]
 
-        tokens = get_active_notification_tokens(db)
+        db = SessionLocal()
+        try:
+            tokens = get_active_notification_tokens(db)
+        finally:
+            db.close()
 
         if not tokens:
             print("⚠️ No active notification tokens found. Skipping push.")
-            return
+            return None
 
         article_url = f"https://hotonnet.com/article/{slug}"
-
-        short_summary = summary.strip()
-        if len(short_summary) > 120:
-            short_summary = short_summary[:110] + "..."
+        short_summary = _short_summary(summary)
 
         print(
             "PUSH DEBUG:",
@@ -147,12 +337,367 @@ def run():
         )
 
         print("✅ Push sent:", push_resp)
+        return push_resp
+
+    def indexed(r):
+        _, _, _, slug = article_fields(r)
+        return submit_url_to_bing(f"https://hotonnet.com/article/{slug}")
+
+    fns = {
+        "links": links,
+        "articles": articles,
+        "context": context,
+        "article": article,
+        "category": category,
+        "image_prompt": image_prompt,
+        "image": image,
+        "saved": saved,
+        "tweeted": tweeted,
+        "notified": notified,
+        "indexed": indexed,
+    }
+    return [
+        Stage(
+            name,
+            _traced(name, fns[name]),
+            deps,
+            timeout=None if name in SIDE_EFFECT_STAGES else STAGE_TIMEOUTS[name],
+        )
+        for name, deps in PIPELINE_GRAPH.items()
+    ]
+
+
+def _traced(name: str, fn):
+    def run_stage(r):
+        with span(f"stage.{name}", **{"pipeline.stage": name}):
+            return fn(r)
+
+    return run_stage
+
+
+def _record_trace(db, run_id, trace, extra_stages: dict | None = None):
+    """Exports the spans and stores a per-run timing summary. Never raises."""
+    try:
+        export_trace(trace)
+
+        summary = summarize(trace)
+        summary["stages"].update(extra_stages or {})
+        print(json.dumps({"event": "pipeline_trace", "run_id": str(run_id), **summary}))
+
+        save_pipeline_trace(db, run_id=run_id, summary=summary)
+    except Exception as e:
+        db.rollback()
+        print("[Tracing] failed to record trace:", e)
+
+
+def run_pipeline(run_id, topic_ms: float | None = None) -> dict:
+    """
+    Produces one article for a pipeline run, overlapping independent stages
+    and skipping every stage already checkpointed. Checkpoints are written
+    from this thread only, so one DB session is enough.
+    """
+    db = SessionLocal()
+    run = get_pipeline_run(db, run_id)
+    trace = None
+
+    try:
+        topic = run.topic.get("title")
+        if not topic:
+            raise RuntimeError(f"Invalid topic_data returned: {run.topic}")
+
+        print("Topic idea:", run.topic, "| completed:", run.completed_stages)
+
+        def checkpoint(stage: str, result):
+            if stage in CHECKPOINT_FIELDS:
+                save_pipeline_stage(db, run, stage, **CHECKPOINT_FIELDS[stage](result))
 
-        submit_url_to_bing(article_url)
+        with start_trace(
+            "pipeline",
+            **{
+                "pipeline.run_id": str(run.id),
+                "pipeline.topic": topic,
+                "pipeline.attempt": run.attempts,
+            },
+        ) as trace:
+            results = run_dag(
+                _build_stages(topic),
+                done=_checkpointed_results(run),
+                on_complete=checkpoint,
+                max_workers=PIPELINE_WORKERS,
+            )
+
+        complete_pipeline_run(db, run)
+        return {
+            "topic": topic,
+            "slug": slugify(results["article"]["title"]),
+            "run_id": str(run.id),
+        }
+
+    except Exception as e:
+        fail_pipeline_run(db, run, f"{e.__class__.__name__}: {e}")
+        raise
+
+    finally:
+        if trace is not None:
+            _record_trace(db, run.id, trace, {"topic": topic_ms} if topic_ms else None)
+        db.close()
+
+
+def _open_runs(db, n: int, resume: bool):
+    """
+    Up to n runs to work on: failed runs resumed first, the rest fresh
+    topics. Returns (runs, ids of fresh runs, topic selection ms).
+    """
+    runs = []
+
+    # =========================
+    # 0️⃣ Resume failed runs
+    # =========================
+    if resume:
+        for failed_run in get_resumable_pipeline_runs(db, limit=n):
+            restart_pipeline_run(db, failed_run)
+            runs.append(failed_run)
+            print(f"♻️ Resuming run {failed_run.id} after stage '{failed_run.stage}'")
+
+    # =========================
+    # 1️⃣ Pick TOPICS (ideas)
+    # =========================
+    topic_ms = None
+    fresh_ids = set()
+    if len(runs) < n:
+        start = time.perf_counter()
+        picked = TopicAgent(db).pick(n - len(runs))
+        topic_ms = round((time.perf_counter() - start) * 1000, 1)
+        print(f"⏱️ Topic selection took {topic_ms} ms")
+
+        for topic_data in picked:
+            new_run = create_pipeline_run(db, topic=topic_data)
+            if new_run is None:
+                print(f"⚠️ Topic already claimed, skipping: {topic_data['title']}")
+                continue
+            runs.append(new_run)
+            fresh_ids.add(new_run.id)
+
+    return runs, fresh_ids, topic_ms
+
+
+def run(n: int = 1, resume: bool = True) -> list[dict]:
+    """
+    Runs n pipelines concurrently: failed runs are resumed from their last
+    checkpoint first, the rest get fresh topics. A failing pipeline is
+    reported and skipped; the batch only fails if nothing was published.
+    """
+    db = SessionLocal()
+    try:
+        runs, fresh_ids, topic_ms = _open_runs(db, n, resume)
+        run_ids = [r.id for r in runs]
+    finally:
+        db.close()
+
+    print(f"📰 Batch of {len(run_ids)} pipeline(s)")
+    if not run_ids:
+        raise RuntimeError("No topic could be claimed")
+
+    results: list[dict] = []
+    with ThreadPoolExecutor(max_workers=min(len(run_ids), MAX_PARALLEL_ARTICLES)) as executor:
+        futures = {
+            executor.submit(
+                run_pipeline, run_id, topic_ms if run_id in fresh_ids else None
+            ): run_id
+            for run_id in run_ids
+        }
+
+        for future in as_completed(futures):
+            run_id = futures[future]
+            try:
+                results.append({"status": "ok", **future.result()})
+            except Exception as e:
+                print(f"❌ Pipeline failed | run={run_id} | {e.__class__.__name__}: {e}")
+                results.append({"status": "failed", "run_id": str(run_id), "error": str(e)})
+
+    ok = sum(1 for r in results if r["status"] == "ok")
+    print(f"🏁 Batch done | {ok}/{len(results)} article(s) published")
+
+    if not ok:
+        raise RuntimeError(f"All pipelines failed: {results}")
+
+    return results
+
+
+# =========================
+# JOB QUEUE (multi-worker mode)
+# =========================
+# A lease outlives its stage timeout and is renewed by a heartbeat while
+# the job runs (side-effect stages have no timeout at all), so only a dead
+# worker loses its job
+JOB_LEASES = {stage: timeout + 60 for stage, timeout in STAGE_TIMEOUTS.items()}
+# Heartbeats per lease period; a few missed ones do not lose the lease
+JOB_HEARTBEATS_PER_LEASE = 4
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "30"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
 
+
+def enqueue(n: int = 1, resume: bool = True) -> list:
+    """Opens up to n runs and queues their runnable stages for workers."""
+    db = SessionLocal()
+    try:
+        runs, _, _ = _open_runs(db, n, resume)
+        for pipeline_run in runs:
+            enqueue_pipeline_run(
+                db, pipeline_run, graph=PIPELINE_GRAPH, max_attempts=JOB_MAX_ATTEMPTS
+            )
+            print(f"📥 Queued run {pipeline_run.id} | topic='{pipeline_run.topic['title']}'")
+        return [r.id for r in runs]
+    finally:
+        db.close()
+
+
+def _run_job(db, job, worker_id: str):
+    pipeline_run = get_pipeline_run(db, job.run_id)
+    topic = pipeline_run.topic["title"]
+    stage = next(s for s in _build_stages(topic) if s.name == job.stage)
+
+    trace = None
+    try:
+        with start_trace(
+            "pipeline.job",
+            **{
+                "pipeline.run_id": str(pipeline_run.id),
+                "pipeline.topic": topic,
+                "pipeline.attempt": job.attempts,
+                "worker.id": worker_id,
+            },
+        ) as trace:
+            # Dependencies come from the run's checkpoints; run_dag enforces the timeout
+            results = run_dag(
+                [Stage(stage.name, stage.fn, timeout=stage.timeout)],
+                done=_checkpointed_results(pipeline_run),
+            )
+
+        finished = complete_pipeline_job(
+            db,
+            job,
+            worker_id=worker_id,
+            outputs=CHECKPOINT_FIELDS[job.stage](results[job.stage]),
+            graph=PIPELINE_GRAPH,
+        )
+        if finished is None:
+            print(f"⚠️ Lease lost, result discarded | {job.stage} | run={job.run_id}")
+        elif finished.status == "completed":
+            print(f"🏁 Run completed | run={finished.id} | topic='{topic}'")
+    finally:
+        if trace is not None:
+            _record_trace(db, pipeline_run.id, trace)
+
+
+@contextmanager
+def _lease_heartbeat(job, worker_id: str):
+    """Renews the job's lease in the background while the block runs."""
+    lease = JOB_LEASES.get(job.stage, 600)
+    stop = threading.Event()
+
+    def beat():
+        db = SessionLocal()
+        try:
+            while not stop.wait(lease / JOB_HEARTBEATS_PER_LEASE):
+                try:
+                    if not renew_pipeline_job_lease(
+                        db, job.id, worker_id=worker_id, lease=lease
+                    ):
+                        print(f"⚠️ Lease lost while running | {job.stage} | run={job.run_id}")
+                        return
+                except Exception as e:
+                    db.rollback()
+                    print("[Worker] lease renewal failed:", e)
+        finally:
+            db.close()
+
+    thread = threading.Thread(target=beat, name=f"lease-{job.id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def work(burst: bool = False):
+    """
+    Pulls stage jobs until stopped (or, with burst, until nothing is
+    claimable). Start as many worker processes as needed; they coordinate
+    only through the pipeline_jobs table.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"👷 Worker {worker_id} started")
+
+    db = SessionLocal()
+    try:
+        while True:
+            job = claim_pipeline_job(db, worker_id=worker_id, leases=JOB_LEASES)
+            if job is None:
+                if burst:
+                    print("📭 No runnable jobs, worker exiting")
+                    return
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+
+            print(
+                f"⚙️ Job '{job.stage}' | run={job.run_id} "
+                f"| attempt {job.attempts}/{job.max_attempts}"
+            )
+            try:
+                with _lease_heartbeat(job, worker_id):
+                    _run_job(db, job, worker_id)
+            except Exception as e:
+                error = f"{e.__class__.__name__}: {e}"
+                retrying = fail_pipeline_job(
+                    db, job, error, worker_id=worker_id, backoff_seconds=JOB_RETRY_BACKOFF
+                )
+                if retrying is None:
+                    print(f"⚠️ Lease lost, failure discarded | {job.stage} | run={job.run_id}")
+                elif retrying:
+                    print(f"🔁 Job '{job.stage}' will retry | run={job.run_id} | {error}")
+                else:
+                    print(f"❌ Job '{job.stage}' gave up | run={job.run_id} | {error}")
     finally:
         db.close()
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Generate and publish articles")
+    parser.add_argument(
+        "-n",
+        type=int,
+        default=int(os.getenv("ARTICLES_PER_RUN", "1")),
+        help="number of articles to produce in this run",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="do not resume failed runs from their last checkpoint",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="queue the runs for workers instead of running them here",
+    )
+    mode.add_argument(
+        "--worker",
+        action="store_true",
+        help="process queued stage jobs",
+    )
+    parser.add_argument(
+        "--burst",
+        action="store_true",
+        help="with --worker: exit once no job is runnable",
+    )
+    args = parser.parse_args()
+
+    if args.worker:
+        work(burst=args.burst)
+    elif args.enqueue:
+        enqueue(n=args.n, resume=not args.no_resume)
+    else:
+        run(n=args.n, resume=not args.no_resume)
@@ -0,0 +1,129 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+
+class StageTimeout(TimeoutError):
+    pass
+
+
+class Stage:
+    """
+    A node in the pipeline graph.
+    fn receives the dict of results produced so far (at least all deps).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[dict], Any],
+        deps: tuple[str, ...] = (),
+        timeout: float | None = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.deps = deps
+        self.timeout = timeout
+
+
+def _check_graph(stages: dict[str, Stage]):
+    for stage in stages.values():
+        for dep in stage.deps:
+            if dep not in stages:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    # Kahn's algorithm: every stage must become reachable
+    remaining = {name: set(stage.deps) for name, stage in stages.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_dag(
+    stages: list[Stage],
+    *,
+    done: dict | None = None,
+    on_complete: Callable[[str, Any], None] | None = None,
+    max_workers: int = 4,
+) -> dict:
+    """
+    Runs each stage as soon as its dependencies have finished, overlapping
+    independent stages in a thread pool.
+
+    - done: results of stages completed earlier (e.g. checkpoints); skipped.
+    - on_complete(name, result): called in the caller's thread, in completion
+      order, so it may safely use the caller's DB session.
+    - A stage exceeding its timeout fails with StageTimeout. Its thread cannot
+      be killed and is abandoned.
+
+    On the first failure no new stages are started, in-flight stages are
+    allowed to finish (their results still reach on_complete), and the
+    first error is raised.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    _check_graph(by_name)
+
+    results = dict(done or {})
+    pending = {name: stage for name, stage in by_name.items() if name not in results}
+    running: dict = {}  # future -> (stage, deadline)
+    first_error: BaseException | None = None
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dag")
+    try:
+        while pending or running:
+            if first_error is None:
+                ready = [
+                    stage
+                    for stage in pending.values()
+                    if all(dep in results for dep in stage.deps)
+                ]
+                for stage in ready:
+                    del pending[stage.name]
+                    deadline = time.monotonic() + stage.timeout if stage.timeout else None
+                    # Copy the context so tracing spans nest under the caller's
+                    ctx = contextvars.copy_context()
+                    future = executor.submit(ctx.run, stage.fn, results)
+                    running[future] = (stage, deadline)
+
+            if not running:
+                break
+
+            deadlines = [d for _, d in running.values() if d is not None]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            finished, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                stage, _ = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ Stage '{stage.name}' failed: {e.__class__.__name__}: {e}")
+                    first_error = first_error or e
+                    continue
+
+                results[stage.name] = result
+                if on_complete:
+                    on_complete(stage.name, result)
+
+            now = time.monotonic()
+            for future, (stage, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline and not future.done():
+                    running.pop(future)
+                    print(f"⏱️ Stage '{stage.name}' timed out after {stage.timeout}s")
+                    first_error = first_error or StageTimeout(
+                        f"Stage '{stage.name}' exceeded {stage.timeout}s"
+                    )
+    finally:
+        # Do not block on abandoned (timed-out) stages
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if first_error is not None:
+        raise first_error
+
+    return results
@@ -0,0 +1,262 @@
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+from app.db.database import SessionLocal
+from app.db.repository import (
+    claim_domain_probe,
+    ensure_domain_health,
+    get_domain_health,
+    release_domain_probe,
+)
+
+# =========================
+# CONFIG
+# =========================
+# "off" extracts every domain (health is not read or written)
+CIRCUIT_BREAKER_ENABLED = os.getenv("DOMAIN_CIRCUIT_BREAKER", "on") != "off"
+# Concurrent extractions per domain within one process
+DOMAIN_CONCURRENCY = int(os.getenv("EXTRACTION_DOMAIN_CONCURRENCY", "2"))
+
+# A closed circuit opens after this many failures in a row...
+FAILURE_THRESHOLD = 3
+# ...or, once MIN_SAMPLES extractions are known, when most recent ones
+# fail or successful ones are this slow
+MIN_SAMPLES = 5
+FAILURE_RATE_THRESHOLD = 0.6
+SLOW_LATENCY_MS = float(os.getenv("DOMAIN_SLOW_LATENCY_MS", "8000"))
+EWMA_ALPHA = 0.3
+
+# Cooldown before a half-open probe; doubles per consecutive trip
+OPEN_COOLDOWN = timedelta(hours=1)
+MAX_OPEN_COOLDOWN = timedelta(days=7)
+# How long a probe may run before another process may probe again
+PROBE_LEASE = timedelta(minutes=10)
+
+# Formerly the static BLOCKED_DOMAINS list (hard paywalls). They start
+# with an open circuit and get probed like any other domain.
+SEED_OPEN_DOMAINS = (
+    "nytimes.com",
+    "wsj.com",
+    "bloomberg.com",
+    "axios.com",
+    "forbes.com",
+)
+SEED_COOLDOWN = MAX_OPEN_COOLDOWN
+
+# Extraction outcomes
+OK = "ok"
+TIMEOUT = "timeout"
+EMPTY = "empty"
+ERROR = "error"
+
+
+def domain_of(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _is_seed(domain: str) -> bool:
+    return any(domain == d or domain.endswith("." + d) for d in SEED_OPEN_DOMAINS)
+
+
+# =========================
+# PER-DOMAIN CONCURRENCY
+# =========================
+_slots: dict[str, threading.BoundedSemaphore] = {}
+_slots_lock = threading.Lock()
+
+
+@contextmanager
+def slot(domain: str):
+    """At most DOMAIN_CONCURRENCY extractions per domain at once."""
+    semaphore = _slots.get(domain)
+    if semaphore is None:
+        with _slots_lock:
+            semaphore = _slots.setdefault(domain, threading.BoundedSemaphore(DOMAIN_CONCURRENCY))
+
+    with semaphore:
+        yield
+
+
+# =========================
+# CIRCUIT BREAKER
+# =========================
+def admit(urls: list[str]) -> tuple[list[str], dict[str, str], dict[str, datetime]]:
+    """
+    Splits urls into those worth extracting and {url: reason} for the
+    ones whose domain circuit is open. An open circuit past its cooldown
+    lets exactly one URL through as a half-open probe; probes are also
+    returned as {url: previous opened_until} so one that never runs can
+    be handed back (see release_probes). Fails open: if the table cannot
+    be read, every URL is admitted.
+    """
+    if not CIRCUIT_BREAKER_ENABLED or not urls:
+        return list(urls), {}, {}
+
+    domains = {url: domain_of(url) for url in urls}
+
+    db = SessionLocal()
+    try:
+        rows = get_domain_health(db, set(domains.values()))
+
+        seeds = sorted({d for d in domains.values() if d not in rows and _is_seed(d)})
+        if seeds:
+            ensure_domain_health(
+                db,
+                [
+                    {
+                        "domain": d,
+                        "state": "open",
+                        "opened_until": datetime.now(timezone.utc) + SEED_COOLDOWN,
+                        "last_error": "Seeded from the blocked domains list",
+                    }
+                    for d in seeds
+                ],
+            )
+            rows = get_domain_health(db, set(domains.values()))
+
+        now = datetime.now(timezone.utc)
+        admitted, skipped, probes = [], {}, {}
+
+        for url, domain in domains.items():
+            row = rows.get(domain)
+            if row is None or row.state == "closed":
+                admitted.append(url)
+            elif any(domain_of(probe) == domain for probe in probes):
+                skipped[url] = f"half-open probe for {domain} in flight"
+            elif row.opened_until and row.opened_until <= now and claim_domain_probe(
+                db, domain, lease=PROBE_LEASE
+            ):
+                print(f"🔌 Probing {domain} (circuit half-open)")
+                probes[url] = row.opened_until
+                admitted.append(url)
+            else:
+                skipped[url] = f"circuit {row.state} for {domain}"
+
+        return admitted, skipped, probes
+
+    except Exception as e:
+        db.rollback()
+        print("[Domain health] lookup failed:", e)
+        return list(urls), {}, {}
+
+    finally:
+        db.close()
+
+
+def release_probes(probes: dict[str, datetime]):
+    """
+    Hands back half-open probes that produced no outcome (cancelled or
+    abandoned with the batch), instead of leaving their domains half-open
+    until PROBE_LEASE runs out.
+    """
+    if not CIRCUIT_BREAKER_ENABLED or not probes:
+        return
+
+    db = SessionLocal()
+    try:
+        for url, opened_until in probes.items():
+            domain = domain_of(url)
+            if release_domain_probe(db, domain, opened_until=opened_until):
+                print(f"🔌 Probe for {domain} did not run, circuit open again")
+
+    except Exception as e:
+        db.rollback()
+        print("[Domain health] probe release failed:", e)
+
+    finally:
+        db.close()
+
+
+def _cooldown(trips: int) -> timedelta:
+    return min(OPEN_COOLDOWN * (2 ** max(trips - 1, 0)), MAX_OPEN_COOLDOWN)
+
+
+def _open(row, now: datetime, reason: str):
+    row.trips += 1
+    row.state = "open"
+    row.opened_until = now + _cooldown(row.trips)
+    print(f"🔌 Circuit opened for {row.domain} until {row.opened_until:%Y-%m-%d %H:%M} ({reason})")
+
+
+def _apply(row, outcomes: list[tuple[str, float | None, str | None]], now: datetime):
+    for outcome, seconds, error in outcomes:
+        row.requests += 1
+
+        if outcome == OK:
+            row.consecutive_failures = 0
+            row.failure_rate = (1 - EWMA_ALPHA) * row.failure_rate
+            if seconds is not None:
+                ms = seconds * 1000
+                row.latency_ms = (
+                    ms if row.latency_ms is None
+                    else (1 - EWMA_ALPHA) * row.latency_ms + EWMA_ALPHA * ms
+                )
+            continue
+
+        row.consecutive_failures += 1
+        row.failure_rate = (1 - EWMA_ALPHA) * row.failure_rate + EWMA_ALPHA
+        row.last_error = error
+        if outcome == TIMEOUT:
+            row.timeouts += 1
+        elif outcome == EMPTY:
+            row.empties += 1
+        else:
+            row.errors += 1
+
+    delivered = any(outcome == OK for outcome, _, _ in outcomes)
+
+    if row.state == "half_open":
+        if delivered:
+            row.state = "closed"
+            row.trips = 0
+            row.opened_until = None
+            row.consecutive_failures = 0
+            row.failure_rate = 0.0
+            print(f"✅ Circuit closed for {row.domain}")
+        else:
+            _open(row, now, "probe failed")
+        return
+
+    if row.state != "closed":
+        return
+
+    if row.consecutive_failures >= FAILURE_THRESHOLD:
+        _open(row, now, f"{row.consecutive_failures} failures in a row")
+    elif row.requests >= MIN_SAMPLES and row.failure_rate >= FAILURE_RATE_THRESHOLD:
+        _open(row, now, f"failure rate {row.failure_rate:.0%}")
+    elif row.requests >= MIN_SAMPLES and (row.latency_ms or 0) >= SLOW_LATENCY_MS:
+        _open(row, now, f"{row.latency_ms:.0f} ms average")
+
+
+def record(results: list[tuple[str, str, float | None, str | None]]):
+    """
+    Folds a batch of (url, outcome, seconds, error) into each domain's
+    health and trips or resets circuits accordingly.
+    """
+    if not CIRCUIT_BREAKER_ENABLED or not results:
+        return
+
+    by_domain: dict[str, list] = {}
+    for url, outcome, seconds, error in results:
+        by_domain.setdefault(domain_of(url), []).append((outcome, seconds, error))
+
+    db = SessionLocal()
+    try:
+        ensure_domain_health(db, [{"domain": d} for d in sorted(by_domain)])
+        rows = get_domain_health(db, by_domain, for_update=True)
+
+        now = datetime.now(timezone.utc)
+        for domain, outcomes in by_domain.items():
+            _apply(rows[domain], outcomes, now)
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        print("[Domain health] write failed:", e)
+
+    finally:
+        db.close()
@@ -3,6 +3,8 @@ import json
 import firebase_admin
 from firebase_admin import credentials, messaging
 
+from app.services.provider_fixtures import provider_fixture
+
 
 def init_firebase():
     """Initialize Firebase Admin only once."""
@@ -19,6 +21,8 @@ def init_firebase():
     firebase_admin.initialize_app(cred)
 
 
+# Tokens come from the local DB, so they are not part of the fixture key
+@provider_fixture("push", ignore=("tokens",))
 def send_push_to_tokens(
     tokens: list[str],
     title: str,
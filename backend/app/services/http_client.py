@@ -0,0 +1,408 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+from app.services.metrics import (
+    HTTP_CLIENT_IN_FLIGHT,
+    HTTP_CLIENT_LATENCY,
+    HTTP_CLIENT_POOL_WAIT,
+    HTTP_CLIENT_REQUESTS,
+    record_cache,
+)
+
+# =========================
+# CONFIG
+# =========================
+# (connect, read) seconds; callers may pass their own
+DEFAULT_TIMEOUT = (
+    float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("HTTP_READ_TIMEOUT", "15")),
+)
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+# Concurrent requests allowed to one host across all threads
+PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "8"))
+
+# Connection errors and gateway failures are retried for idempotent
+# methods only; 429s are left to the caller so Retry-After never blocks
+# a worker thread for minutes.
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+RETRY_STATUSES = (502, 503, 504)
+
+USER_AGENT = "Mozilla/5.0 (compatible; HotOnNetBot/1.0; +https://hotonnet.com)"
+# For publisher pages: many news sites refuse self-identified bots
+BROWSER_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# On-disk response cache shared by every process on the box; empty disables
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", ".cache/http_cache.sqlite")
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", "100")) * 1024 * 1024
+# Stale entries are kept this long past expiry for revalidation (ETag/304)
+HTTP_CACHE_MAX_STALE = int(os.getenv("HTTP_CACHE_MAX_STALE", str(24 * 3600)))
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def _retry_policy() -> Retry:
+    return Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        raise_on_status=False,
+    )
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide keep-alive session. requests.Session is safe to share
+    between threads for plain requests; the adapter pools up to
+    POOL_MAXSIZE connections per host and retries per _retry_policy().
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=20,
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=_retry_policy(),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                _session = session
+
+    return _session
+
+
+# =========================
+# PER-HOST LIMITS
+# =========================
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).hostname or "unknown"
+
+
+def _slot(host: str) -> threading.BoundedSemaphore:
+    slot = _host_slots.get(host)
+    if slot is None:
+        with _host_slots_lock:
+            slot = _host_slots.setdefault(host, threading.BoundedSemaphore(PER_HOST_LIMIT))
+    return slot
+
+
+def request(method: str, url: str, *, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    """
+    Every outbound call in the backend goes through here: shared pool,
+    at most PER_HOST_LIMIT concurrent requests per host, default timeouts
+    and per-host metrics. With stream=True the slot is released once the
+    headers arrive; the connection returns to the pool when the body is
+    consumed or the response closed.
+    """
+    host = _host(url)
+    method = method.upper()
+    slot = _slot(host)
+
+    wait_start = time.perf_counter()
+    slot.acquire()
+    start = time.perf_counter()
+    HTTP_CLIENT_POOL_WAIT.observe(start - wait_start, host)
+    HTTP_CLIENT_IN_FLIGHT.inc(1, host)
+
+    status = "error"
+    try:
+        resp = get_session().request(method, url, timeout=timeout, **kwargs)
+        status = str(resp.status_code)
+        return resp
+    finally:
+        HTTP_CLIENT_IN_FLIGHT.dec(1, host)
+        slot.release()
+        HTTP_CLIENT_LATENCY.observe(time.perf_counter() - start, host)
+        HTTP_CLIENT_REQUESTS.inc(1, host, method, status)
+
+
+def get(url: str, *, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    return request("GET", url, timeout=timeout, **kwargs)
+
+
+def head(url: str, *, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    return request("HEAD", url, timeout=timeout, **kwargs)
+
+
+def post(url: str, *, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    return request("POST", url, timeout=timeout, **kwargs)
+
+
+# =========================
+# ASYNC CLIENT (httpx)
+# =========================
+_async_client = None
+_async_slots: dict[str, asyncio.Semaphore] = {}
+
+
+def get_async_client():
+    """
+    Lazily built httpx.AsyncClient with the same pool size, timeouts and
+    User-Agent as the sync session. Bound to the event loop that first
+    uses it; close it with aclose() on shutdown.
+    """
+    global _async_client
+
+    if _async_client is None:
+        import httpx  # only async callers need it
+
+        connect, read = DEFAULT_TIMEOUT
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(
+                max_connections=POOL_MAXSIZE * 5,
+                max_keepalive_connections=POOL_MAXSIZE,
+            ),
+            # httpx only retries failed connects; status retries stay with the caller
+            transport=httpx.AsyncHTTPTransport(retries=HTTP_RETRIES),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+
+    return _async_client
+
+
+async def arequest(method: str, url: str, **kwargs):
+    """Async counterpart of request(), sharing its per-host limit and metrics."""
+    host = _host(url)
+    method = method.upper()
+    slot = _async_slots.setdefault(host, asyncio.Semaphore(PER_HOST_LIMIT))
+
+    wait_start = time.perf_counter()
+    async with slot:
+        start = time.perf_counter()
+        HTTP_CLIENT_POOL_WAIT.observe(start - wait_start, host)
+        HTTP_CLIENT_IN_FLIGHT.inc(1, host)
+
+        status = "error"
+        try:
+            resp = await get_async_client().request(method, url, **kwargs)
+            status = str(resp.status_code)
+            return resp
+        finally:
+            HTTP_CLIENT_IN_FLIGHT.dec(1, host)
+            HTTP_CLIENT_LATENCY.observe(time.perf_counter() - start, host)
+            HTTP_CLIENT_REQUESTS.inc(1, host, method, status)
+
+
+async def aget(url: str, **kwargs):
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url: str, **kwargs):
+    return await arequest("POST", url, **kwargs)
+
+
+async def aclose():
+    global _async_client
+
+    if _async_client is not None:
+        client, _async_client = _async_client, None
+        await client.aclose()
+    _async_slots.clear()
+
+
+# =========================
+# HTTP CACHE (SQLite)
+# =========================
+_local = threading.local()
+
+
+def _db() -> sqlite3.Connection:
+    """One connection per thread; SQLite serializes writers across processes."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        Path(HTTP_CACHE_PATH).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(HTTP_CACHE_PATH, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_last_access ON responses (last_access)")
+        _local.conn = conn
+    return conn
+
+
+def _freshness(headers, default_ttl: float) -> float | None:
+    """Seconds the response may be reused; None means do not store it."""
+    directives = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name, "").isdigit():
+            return int(directives[name])
+
+    if headers.get("Expires"):
+        try:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+            date = headers.get("Date")
+            now = parsedate_to_datetime(date).timestamp() if date else time.time()
+            return max(0.0, expires - now)
+        except (TypeError, ValueError):
+            return 0
+
+    return default_ttl
+
+
+def _cached_response(url: str, headers: dict, body: bytes) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = url
+    resp.headers = CaseInsensitiveDict(headers)
+    resp._content = body
+    resp.from_cache = True
+    return resp
+
+
+def _store(url: str, resp: requests.Response, ttl: float):
+    now = time.time()
+    body = resp.content
+    conn = _db()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (url, json.dumps(dict(resp.headers)), body, len(body), now + ttl, now),
+        )
+    _evict(conn)
+
+
+def _evict(conn: sqlite3.Connection):
+    """Drops long-stale entries, then least recently used ones past the size cap."""
+    with conn:
+        conn.execute(
+            "DELETE FROM responses WHERE expires_at < ?",
+            (time.time() - HTTP_CACHE_MAX_STALE,),
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= HTTP_CACHE_MAX_BYTES:
+            return
+
+        target = total - HTTP_CACHE_MAX_BYTES * 0.9
+        freed = 0
+        victims = []
+        for url, size in conn.execute("SELECT url, size FROM responses ORDER BY last_access"):
+            victims.append((url,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+
+
+def cached_get(
+    url: str,
+    *,
+    default_ttl: float = 300,
+    timeout=DEFAULT_TIMEOUT,
+    headers: dict | None = None,
+    cache_name: str = "http",
+) -> requests.Response:
+    """
+    GET through the on-disk cache. A fresh entry is served without any
+    network I/O; a stale one is revalidated with its ETag/Last-Modified
+    and reused on 304. Freshness follows the server's Cache-Control /
+    Expires, falling back to default_ttl when it sends neither. The
+    cache owns conditional requests, so callers send no validators of
+    their own. Responses served from disk have `from_cache = True`.
+    """
+    if not HTTP_CACHE_PATH:
+        resp = get(url, timeout=timeout, headers=headers)
+        resp.from_cache = False
+        return resp
+
+    headers = dict(headers or {})
+
+    try:
+        row = _db().execute(
+            "SELECT headers, body, expires_at FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+    except sqlite3.Error as e:
+        print("[HTTP cache] read failed:", e)
+        row = None
+
+    cached_headers = CaseInsensitiveDict(json.loads(row[0])) if row else None
+    if row and row[2] > time.time():
+        record_cache(cache_name, True)
+        try:
+            with _db() as conn:
+                conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url)
+                )
+        except sqlite3.Error:
+            pass  # LRU bookkeeping only
+        return _cached_response(url, cached_headers, row[1])
+
+    if row:
+        if cached_headers.get("ETag"):
+            headers["If-None-Match"] = cached_headers["ETag"]
+        if cached_headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+    resp = get(url, timeout=timeout, headers=headers)
+
+    if resp.status_code == 304 and row:
+        record_cache(cache_name, True)
+        merged = CaseInsensitiveDict(cached_headers)
+        merged.update(resp.headers)
+        ttl = _freshness(merged, default_ttl)
+        revalidated = _cached_response(url, merged, row[1])
+        if ttl is not None:
+            try:
+                _store(url, revalidated, ttl)
+            except sqlite3.Error as e:
+                print("[HTTP cache] write failed:", e)
+        return revalidated
+
+    record_cache(cache_name, False)
+    resp.from_cache = False
+
+    if resp.status_code == 200:
+        ttl = _freshness(resp.headers, default_ttl)
+        if ttl is not None:
+            try:
+                _store(url, resp, ttl)
+            except sqlite3.Error as e:
+                print("[HTTP cache] write failed:", e)
+
+    return resp
@@ -0,0 +1,83 @@
+import re
+from functools import lru_cache
+
+# =========================
+# VARIANT CONFIG
+# =========================
+# name -> (width, height); all 16:9 except the OG card
+IMAGE_VARIANTS = {
+    "thumbnail": (320, 180),
+    "card": (640, 360),
+    "hero": (1280, 720),
+}
+OG_VARIANT = (1200, 630)
+
+# Modern formats first; jpg is the <img> fallback
+IMAGE_FORMATS = ("avif", "webp", "jpg")
+
+# secure_url as returned by cloudinary.uploader.upload:
+# https://res.cloudinary.com/<cloud>/image/upload/v<version>/<public_id>.<ext>
+CLOUDINARY_URL_RE = re.compile(
+    r"^https?://res\.cloudinary\.com/(?P<cloud>[^/]+)/image/upload/"
+    r"(?:(?P<version>v\d+)/)?"
+    r"(?P<public_id>.+?)(?:\.(?P<ext>[a-zA-Z0-9]+))?$"
+)
+
+
+def _variant_url(cloud: str, version: str | None, public_id: str, width: int, height: int, fmt: str) -> str:
+    transforms = f"c_fill,g_auto,w_{width},h_{height},q_auto,f_{fmt}"
+    version_part = f"{version}/" if version else ""
+    return (
+        f"https://res.cloudinary.com/{cloud}/image/upload/"
+        f"{transforms}/{version_part}{public_id}.{fmt}"
+    )
+
+
+@lru_cache(maxsize=4096)
+def build_image_variants(image_url: str | None) -> dict | None:
+    """
+    Derives resized AVIF/WebP/JPEG delivery URLs from a stored Cloudinary
+    URL. Pure string work on the public_id (Cloudinary renders and caches
+    the derived images on first fetch), memoized per URL.
+
+    Returns None for non-Cloudinary URLs so callers fall back to image_url.
+    """
+    if not image_url:
+        return None
+
+    match = CLOUDINARY_URL_RE.match(image_url)
+    if not match:
+        return None
+
+    cloud = match.group("cloud")
+    version = match.group("version")
+    public_id = match.group("public_id")
+
+    variants = {}
+    for name, (width, height) in IMAGE_VARIANTS.items():
+        variants[name] = {
+            "width": width,
+            "height": height,
+            **{
+                fmt: _variant_url(cloud, version, public_id, width, height, fmt)
+                for fmt in IMAGE_FORMATS
+            },
+        }
+
+    # Social crawlers handle JPEG most reliably
+    og_width, og_height = OG_VARIANT
+    variants["og"] = {
+        "width": og_width,
+        "height": og_height,
+        "jpg": _variant_url(cloud, version, public_id, og_width, og_height, "jpg"),
+    }
+
+    srcset = {
+        fmt: ", ".join(
+            f"{variants[name][fmt]} {variants[name]['width']}w"
+            for name in IMAGE_VARIANTS
+        )
+        for fmt in IMAGE_FORMATS
+    }
+
+    return {"variants": variants, "srcset": srcset}
@@ -0,0 +1,339 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# =========================
+# BUCKETS
+# =========================
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+# =========================
+# METRIC TYPES
+# =========================
+class Counter:
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def snapshot(self) -> dict[tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Point-in-time value that can go up and down (e.g. in-flight requests)."""
+
+    def dec(self, amount: float = 1, *label_values: str):
+        self.inc(-amount, *label_values)
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} gauge"]
+        for label_values, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() is a bisect plus a few integer
+    increments under a lock, so it is cheap enough for every request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self.buckets = buckets
+        # label_values -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self._series[label_values] = series
+            series[idx] += 1
+            series[-1] += value
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _labels(self.labels + ("le",), label_values + (str(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            cumulative += series[len(self.buckets)]
+            labels = _labels(self.labels + ("le",), label_values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            base = _labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{base} {series[-1]}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+# =========================
+# REGISTRY
+# =========================
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    labels=("method", "route", "status"),
+)
+REQUEST_DB_STATEMENTS = Counter(
+    "http_request_db_statements_total",
+    "DB statements issued while serving requests, by route template.",
+    labels=("route",),
+)
+DB_STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time.",
+    labels=("operation",),
+    buckets=DB_LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    labels=("cache", "result"),
+)
+
+HTTP_CLIENT_REQUESTS = Counter(
+    "http_client_requests_total",
+    "Outbound HTTP requests by host, method and status (or error).",
+    labels=("host", "method", "status"),
+)
+HTTP_CLIENT_LATENCY = Histogram(
+    "http_client_request_duration_seconds",
+    "Outbound HTTP request latency (until response headers), by host.",
+    labels=("host",),
+)
+HTTP_CLIENT_POOL_WAIT = Histogram(
+    "http_client_pool_wait_seconds",
+    "Time spent waiting for a free per-host request slot.",
+    labels=("host",),
+)
+HTTP_CLIENT_IN_FLIGHT = Gauge(
+    "http_client_in_flight_requests",
+    "Outbound HTTP requests currently in flight, by host.",
+    labels=("host",),
+)
+
+REGISTRY = [
+    REQUEST_LATENCY,
+    REQUEST_DB_STATEMENTS,
+    DB_STATEMENT_LATENCY,
+    CACHE_REQUESTS,
+    HTTP_CLIENT_REQUESTS,
+    HTTP_CLIENT_LATENCY,
+    HTTP_CLIENT_POOL_WAIT,
+    HTTP_CLIENT_IN_FLIGHT,
+]
+
+
+# =========================
+# PER-REQUEST STATS
+# =========================
+class RequestStats:
+    __slots__ = ("db_count", "db_time", "timings")
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.timings: dict[str, float] = {}
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+# =========================
+# CACHE HELPERS
+# =========================
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(1, cache, "hit" if hit else "miss")
+
+
+def _cache_hit_ratio_lines() -> list[str]:
+    values = CACHE_REQUESTS.snapshot()
+    caches = sorted({labels[0] for labels in values})
+    lines = [
+        "# HELP cache_hit_ratio Fraction of cache lookups that were hits.",
+        "# TYPE cache_hit_ratio gauge",
+    ]
+    for cache in caches:
+        hits = values.get((cache, "hit"), 0)
+        total = hits + values.get((cache, "miss"), 0)
+        if total:
+            lines.append(f"cache_hit_ratio{_labels(('cache',), (cache,))} {hits / total:.4f}")
+    return lines
+
+
+# =========================
+# PROCESS MEMORY
+# =========================
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _process_memory_lines() -> list[str]:
+    lines = []
+
+    try:
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        lines += [
+            "# HELP process_resident_memory_bytes Resident memory size in bytes.",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes {rss_pages * _PAGE_SIZE}",
+        ]
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if resource is not None:
+        # ru_maxrss is KiB on Linux
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        lines += [
+            "# HELP process_max_resident_memory_bytes Peak resident memory in bytes.",
+            "# TYPE process_max_resident_memory_bytes gauge",
+            f"process_max_resident_memory_bytes {max_rss}",
+        ]
+
+    return lines
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.collect()
+    lines += _cache_hit_ratio_lines()
+    lines += _process_memory_lines()
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# SQLALCHEMY INSTRUMENTATION
+# =========================
+def instrument_engine(engine):
+    """
+    Times every cursor execution on the engine and attributes it to the
+    in-flight HTTP request, if any.
+    """
+
+    # The start time lives on the statement's execution context, not on
+    # the connection: a failing statement never reaches after_cursor_execute
+    # and must not leave state behind that skews later timings
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_query_start
+
+        operation = statement.lstrip()[:6].upper()
+        if operation not in DB_OPERATIONS:
+            operation = "OTHER"
+        DB_STATEMENT_LATENCY.observe(elapsed, operation)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_count += 1
+            stats.db_time += elapsed
+
+
+# =========================
+# ASGI MIDDLEWARE
+# =========================
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware overhead). Labels requests
+    by route template, e.g. /article/{slug}, to keep cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            REQUEST_LATENCY.observe(elapsed, scope["method"], route, str(status_code))
+            if stats.db_count:
+                REQUEST_DB_STATEMENTS.inc(stats.db_count, route)
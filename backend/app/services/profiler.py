@@ -0,0 +1,302 @@
+import asyncio
+import functools
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from app.services.metrics import current_request_stats
+
+# =========================
+# CONFIG
+# =========================
+# Fraction of requests to profile (0 = only signed-header requests)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Shared secret for the X-Profile header: "<unix_ts>:<hmac_sha256(secret, 'ts:path')>"
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")
+PROFILE_HEADER = b"x-profile"
+PROFILE_HEADER_MAX_AGE = 300  # seconds
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_OUTPUT_DIR = Path(os.getenv("PROFILE_OUTPUT_DIR", "profiles"))
+
+# Leaf frames in these files mean the thread is parked, not working
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "base_events.py")
+
+
+# =========================
+# SERVER-TIMING SECTIONS
+# =========================
+@contextmanager
+def server_timing(name: str):
+    """
+    Adds the wall time of the block to the current request's Server-Timing
+    entry `name`. No-op outside a request.
+    """
+    stats = current_request_stats()
+    if stats is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.timings[name] = stats.timings.get(name, 0.0) + (
+            time.perf_counter() - start
+        )
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that reports json encoding time as `serialize`."""
+
+    def render(self, content) -> bytes:
+        with server_timing("serialize"):
+            return super().render(content)
+
+
+# =========================
+# STACK SAMPLER
+# =========================
+class _Session:
+    """
+    Samples for one profiled request. Only the threads registered to it
+    are sampled: the event-loop thread serving the request and, while the
+    endpoint runs, the threadpool worker executing it (see ProfiledRoute).
+    """
+
+    __slots__ = ("samples", "threads")
+
+    def __init__(self):
+        self.samples: Counter = Counter()
+        self.threads: set[int] = set()
+
+
+_active_session: ContextVar[_Session | None] = ContextVar("profile_session", default=None)
+
+
+class _Sampler:
+    """
+    One background thread samples the registered threads while at least
+    one profiling session is active, so concurrent profiled requests do
+    not multiply the sampling overhead.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sessions: set[_Session] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start_session(self, thread_id: int) -> _Session:
+        session = _Session()
+        session.threads.add(thread_id)
+        with self._lock:
+            self._sessions.add(session)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="profiler-sampler", daemon=True
+                )
+                self._thread.start()
+        return session
+
+    def stop_session(self, session: _Session):
+        with self._lock:
+            self._sessions.discard(session)
+
+    def add_thread(self, session: _Session, thread_id: int):
+        with self._lock:
+            session.threads.add(thread_id)
+
+    def remove_thread(self, session: _Session, thread_id: int):
+        with self._lock:
+            session.threads.discard(thread_id)
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                targets = [(s, list(s.threads)) for s in self._sessions]
+
+            frames = sys._current_frames()
+            folded: dict[int, str | None] = {}
+
+            for session, thread_ids in targets:
+                for thread_id in thread_ids:
+                    if thread_id not in folded:
+                        frame = frames.get(thread_id)
+                        idle = frame is None or frame.f_code.co_filename.endswith(_IDLE_FILES)
+                        folded[thread_id] = None if idle else _fold(frame)
+                    if folded[thread_id] is not None:
+                        session.samples[folded[thread_id]] += 1
+
+            time.sleep(self.interval)
+
+
+def _fold(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        module = Path(code.co_filename).stem
+        parts.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+_sampler = _Sampler(PROFILE_INTERVAL)
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def _profiled_thread():
+    """Registers the calling thread with the current request's session."""
+    session = _active_session.get()
+    if session is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    _sampler.add_thread(session, thread_id)
+    try:
+        yield
+    finally:
+        # Worker threads are reused by other requests afterwards
+        _sampler.remove_thread(session, thread_id)
+
+
+def _profiled_endpoint(endpoint):
+    # Async endpoints run on the event-loop thread, which is already sampled
+    if asyncio.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        with _profiled_thread():
+            return endpoint(*args, **kwargs)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class that lets the sampler follow a sync endpoint into the
+    threadpool worker running it. Use it for the app and every router.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+
+def _write_folded(route_key: str, samples: Counter):
+    """Appends collapsed stacks (flamegraph.pl / speedscope format)."""
+    PROFILE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_OUTPUT_DIR / f"{route_key}.folded"
+
+    with _write_lock, path.open("a", encoding="utf-8") as f:
+        for stack, count in samples.items():
+            f.write(f"{stack} {count}\n")
+
+
+# =========================
+# ASGI MIDDLEWARE
+# =========================
+def _has_valid_signature(scope) -> bool:
+    if not PROFILE_SECRET:
+        return False
+
+    value = dict(scope.get("headers") or []).get(PROFILE_HEADER)
+    if not value:
+        return False
+
+    try:
+        ts, signature = value.decode("latin-1").split(":", 1)
+        if abs(time.time() - int(ts)) > PROFILE_HEADER_MAX_AGE:
+            return False
+    except ValueError:
+        return False
+
+    expected = hmac.new(
+        PROFILE_SECRET.encode(),
+        f"{ts}:{scope['path']}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class ProfilerMiddleware:
+    """
+    Profiles a sample of requests (PROFILE_SAMPLE_RATE) or any request that
+    carries a valid signed X-Profile header. Profiled requests get a
+    Server-Timing header and their stacks are appended to
+    PROFILE_OUTPUT_DIR/<METHOD>_<route>.folded. Only this request's threads
+    are sampled; sync endpoints need ProfiledRoute to be followed into
+    the threadpool.
+
+    Must run inside MetricsMiddleware, which owns the per-request stats.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        session = _sampler.start_session(threading.get_ident())
+        token = _active_session.set(session)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                headers.append(
+                    (b"server-timing", self._server_timing(start).encode("latin-1"))
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active_session.reset(token)
+            _sampler.stop_session(session)
+
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            route_key = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{scope['method']}_{route}")
+            if session.samples:
+                await asyncio.to_thread(
+                    _write_folded, route_key.strip("_"), session.samples
+                )
+
+    @staticmethod
+    def _should_profile(scope) -> bool:
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return True
+        return _has_valid_signature(scope)
+
+    @staticmethod
+    def _server_timing(start: float) -> str:
+        stats = current_request_stats()
+        entries = []
+
+        if stats is not None:
+            entries.append(f"db;dur={stats.db_time * 1000:.1f}")
+            for name in ("serialize", "render"):
+                if name in stats.timings:
+                    entries.append(f"{name};dur={stats.timings[name] * 1000:.1f}")
+
+        entries.append(f"total;dur={(time.perf_counter() - start) * 1000:.1f}")
+        return ", ".join(entries)
@@ -0,0 +1,232 @@
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import random
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+
+# =========================
+# CONFIG
+# =========================
+# live: call providers / record: call and save /
+# replay: saved responses (or a registered replay source) only
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live").lower()
+FIXTURE_DIR = Path(os.getenv("PROVIDER_FIXTURE_DIR", "fixtures/providers"))
+
+# Replay latency: fixed per provider, e.g. "writer=1500,image=6000,*=50",
+# otherwise the recorded call time scaled by PROVIDER_LATENCY_SCALE (0 = instant)
+PROVIDER_LATENCY_MS = os.getenv("PROVIDER_LATENCY_MS", "")
+PROVIDER_LATENCY_SCALE = float(os.getenv("PROVIDER_LATENCY_SCALE", "0"))
+
+# Seeds `random` (topic shuffling, retry jitter) so replays are repeatable
+REPLAY_SEED = int(os.getenv("PROVIDER_REPLAY_SEED", "42"))
+
+# Module-level clients read these at import time; replay never calls them
+_REPLAY_ENV_DEFAULTS = {
+    "OPENAI_API_KEY": "replay",
+    "XAI_API_KEY": "replay",
+    "GEMINI_API_KEY": "replay",
+    "HF_TOKEN": "replay",
+    "CLOUDINARY_CLOUD_NAME": "replay",
+    "CLOUDINARY_API_KEY": "replay",
+    "CLOUDINARY_API_SECRET": "replay",
+    "X_API_KEY": "replay",
+    "X_API_SECRET": "replay",
+    "X_ACCESS_TOKEN": "replay",
+    "X_ACCESS_TOKEN_SECRET": "replay",
+    "BING_API_KEY": "replay",
+}
+
+if PROVIDER_MODE not in ("live", "record", "replay"):
+    raise RuntimeError(f"PROVIDER_MODE must be live, record or replay (got {PROVIDER_MODE!r})")
+
+if PROVIDER_MODE == "replay":
+    for _name, _value in _REPLAY_ENV_DEFAULTS.items():
+        os.environ.setdefault(_name, _value)
+    random.seed(REPLAY_SEED)
+
+
+class FixtureNotFound(LookupError):
+    pass
+
+
+class RecordedProviderError(RuntimeError):
+    """Replays a recorded exception whose class could not be rebuilt."""
+
+
+def _parse_latency(spec: str) -> dict[str, float]:
+    latency = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, ms = part.partition("=")
+        latency[name.strip()] = float(ms)
+    return latency
+
+
+_LATENCY = _parse_latency(PROVIDER_LATENCY_MS)
+_write_lock = threading.Lock()
+
+# provider -> callable answering its replayed calls (see set_replay_source)
+_replay_sources: dict[str, Callable] = {}
+
+
+# =========================
+# STORAGE
+# =========================
+def _fixture_key(provider: str, arguments: dict) -> str:
+    canonical = json.dumps(arguments, sort_keys=True, default=str)
+    return hashlib.sha256(f"{provider}:{canonical}".encode()).hexdigest()[:32]
+
+
+def _fixture_path(provider: str, key: str) -> Path:
+    return FIXTURE_DIR / provider / f"{key}.pkl"
+
+
+def _save(path: Path, record: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+    with _write_lock:
+        tmp.write_bytes(pickle.dumps(record))
+        os.replace(tmp, path)
+
+
+def _load(path: Path) -> dict:
+    # Fixtures are local files written by record mode; never load untrusted ones
+    return pickle.loads(path.read_bytes())
+
+
+def _replay_delay(provider: str, record: dict) -> float:
+    if provider in _LATENCY:
+        return _LATENCY[provider] / 1000
+    if "*" in _LATENCY:
+        return _LATENCY["*"] / 1000
+    return record.get("elapsed_ms", 0) * PROVIDER_LATENCY_SCALE / 1000
+
+
+def _error_record(e: Exception) -> dict:
+    return {
+        "error_module": type(e).__module__,
+        "error_type": type(e).__name__,
+        "error": str(e),
+        # e.g. requests.HTTPError: permanent 4xx vs transient 5xx
+        "status_code": getattr(getattr(e, "response", None), "status_code", None),
+    }
+
+
+def _rebuild_error(record: dict) -> Exception:
+    """
+    The recorded exception as its original class, so callers' except
+    clauses and isinstance checks behave as in live runs; an HTTP status
+    comes back as error.response.status_code. Falls back to
+    RecordedProviderError when the class cannot be rebuilt.
+    """
+    try:
+        cls = getattr(importlib.import_module(record["error_module"]), record["error_type"])
+        error = cls(record["error"]) if issubclass(cls, Exception) else None
+    except Exception:
+        error = None
+
+    if error is None:
+        error = RecordedProviderError(f"{record['error_type']}: {record['error']}")
+    if record.get("status_code") is not None and getattr(error, "response", None) is None:
+        error.response = SimpleNamespace(status_code=record["status_code"])
+    return error
+
+
+# =========================
+# REPLAY SOURCES
+# =========================
+def set_replay_source(provider: str, source: Callable | None):
+    """
+    In replay mode, answers `provider` calls with source(**arguments)
+    (the same arguments the fixture key is built from) instead of the
+    recorded files, e.g. a benchmark's simulated provider. None removes
+    it. Ignored in live and record modes.
+    """
+    if source is None:
+        _replay_sources.pop(provider, None)
+    else:
+        _replay_sources[provider] = source
+
+
+# =========================
+# DECORATOR
+# =========================
+def provider_fixture(provider: str, ignore: tuple[str, ...] = ()):
+    """
+    Wraps a call to an external provider so it can be recorded and replayed.
+
+    The fixture key is a hash of the call's arguments (minus `self` and the
+    names in `ignore`, e.g. push tokens that differ between databases).
+    Return values and exceptions are both recorded. In live mode the
+    wrapper is a plain pass-through.
+    """
+
+    def decorator(fn):
+        if PROVIDER_MODE == "live":
+            return fn
+
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {
+                name: value
+                for name, value in bound.arguments.items()
+                if name != "self" and name not in ignore
+            }
+            key = _fixture_key(provider, arguments)
+            path = _fixture_path(provider, key)
+
+            if PROVIDER_MODE == "replay":
+                source = _replay_sources.get(provider)
+                if source is not None:
+                    return source(**arguments)
+                if not path.exists():
+                    raise FixtureNotFound(
+                        f"No {provider} fixture {key} for {arguments!r} "
+                        f"(record one with PROVIDER_MODE=record)"
+                    )
+                record = _load(path)
+                time.sleep(_replay_delay(provider, record))
+                if record["ok"]:
+                    return record["result"]
+                raise _rebuild_error(record)
+
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                _save(
+                    path,
+                    {
+                        "ok": False,
+                        **_error_record(e),
+                        "elapsed_ms": (time.perf_counter() - start) * 1000,
+                        "arguments": repr(arguments)[:2000],
+                    },
+                )
+                raise
+
+            _save(
+                path,
+                {
+                    "ok": True,
+                    "result": result,
+                    "elapsed_ms": (time.perf_counter() - start) * 1000,
+                    "arguments": repr(arguments)[:2000],
+                },
+            )
+            return result
+
+        return wrapper
+
+    return decorator
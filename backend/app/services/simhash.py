@@ -0,0 +1,101 @@
+import hashlib
+import re
+
+# =========================
+# SIMHASH FINGERPRINTS
+# =========================
+FINGERPRINT_BITS = 64
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Headline filler that carries no story identity
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or says "
+    "the to was were will with after over new amid".split()
+)
+
+
+def _features(text: str) -> list[str]:
+    """Words plus character 3-grams, so inflections still overlap."""
+    words = [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+    grams = []
+    for word in words:
+        padded = f"_{word}_"
+        grams += [padded[i : i + 3] for i in range(len(padded) - 2)]
+    return words + grams
+
+
+def _hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash; similar texts differ in few bits."""
+    weights = [0] * FINGERPRINT_BITS
+    for feature in _features(text):
+        h = _hash(feature)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def to_signed(fingerprint: int) -> int:
+    """For BIGINT storage."""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def to_unsigned(value: int) -> int:
+    return value & ((1 << 64) - 1)
+
+
+# =========================
+# LSH INDEX
+# =========================
+class SimHashIndex:
+    """
+    Banded LSH over fingerprints. With max_distance + 1 bands, two
+    fingerprints within max_distance bits must agree on at least one band
+    (pigeonhole), so probing the bands finds every near duplicate while
+    comparing against only a handful of candidates.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.band_count = max_distance + 1
+        self.band_width = FINGERPRINT_BITS // self.band_count
+        self._bands: list[dict[int, list[tuple[int, object]]]] = [
+            {} for _ in range(self.band_count)
+        ]
+
+    def _keys(self, fingerprint: int):
+        mask = (1 << self.band_width) - 1
+        for band in range(self.band_count):
+            # Last band absorbs the leftover bits
+            if band == self.band_count - 1:
+                yield band, fingerprint >> (band * self.band_width)
+            else:
+                yield band, fingerprint >> (band * self.band_width) & mask
+
+    def add(self, fingerprint: int, key):
+        for band, value in self._keys(fingerprint):
+            self._bands[band].setdefault(value, []).append((fingerprint, key))
+
+    def near(self, fingerprint: int):
+        """Key of a fingerprint within max_distance bits, or None."""
+        for band, value in self._keys(fingerprint):
+            for other, key in self._bands[band].get(value, ()):
+                if hamming(fingerprint, other) <= self.max_distance:
+                    return key
+        return None
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._bands[0].values())
@@ -0,0 +1,116 @@
+import math
+import re
+import time
+import zlib
+
+import numpy as np
+
+from app.services.simhash import STOPWORDS
+
+# =========================
+# CONFIG
+# =========================
+SHINGLE_DIMS = 2048
+# Cosine similarity above which two headlines are the same story
+CLUSTER_THRESHOLD = 0.5
+
+COVERAGE_WEIGHT = 0.5
+POSITION_WEIGHT = 0.3
+RECENCY_WEIGHT = 0.2
+RECENCY_HALF_LIFE_HOURS = 6
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _shingles(title: str) -> list[str]:
+    words = [w for w in _WORD_RE.findall(title.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _shingle_matrix(titles: list[str]) -> np.ndarray:
+    """Rows are L2-normalized hashed shingle sets (crc32 is stable across runs)."""
+    matrix = np.zeros((len(titles), SHINGLE_DIMS), dtype=np.float32)
+    for row, title in enumerate(titles):
+        for shingle in _shingles(title):
+            matrix[row, zlib.crc32(shingle.encode()) % SHINGLE_DIMS] = 1.0
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+def cluster_titles(titles: list[str], threshold: float = CLUSTER_THRESHOLD) -> list[list[int]]:
+    """Connected components of the cosine-similarity graph, as index lists."""
+    if not titles:
+        return []
+
+    matrix = _shingle_matrix(titles)
+    similar = (matrix @ matrix.T) >= threshold
+
+    parent = list(range(len(titles)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(similar, k=1))):
+        root_i, root_j = find(int(i)), find(int(j))
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters: dict[int, list[int]] = {}
+    for i in range(len(titles)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+def _score(members: list[dict], feed_count: int, now: float) -> float:
+    feeds = {m.get("feed") for m in members}
+    coverage = len(feeds) / max(feed_count, 1)
+
+    # Best rank the story reached in each feed it appears in
+    best_rank: dict = {}
+    for m in members:
+        rank = m.get("position", 0)
+        best_rank[m.get("feed")] = min(rank, best_rank.get(m.get("feed"), rank))
+    position = sum(1 / (1 + rank) for rank in best_rank.values()) / len(best_rank)
+
+    published = [m["published"] for m in members if m.get("published")]
+    if published:
+        age_hours = max(0.0, (now - max(published)) / 3600)
+        recency = math.pow(0.5, age_hours / RECENCY_HALF_LIFE_HOURS)
+    else:
+        recency = 0.0
+
+    return (
+        COVERAGE_WEIGHT * coverage
+        + POSITION_WEIGHT * position
+        + RECENCY_WEIGHT * recency
+    )
+
+
+def rank_topics(candidates: list[dict], feed_count: int, now: float | None = None) -> list[dict]:
+    """
+    Clusters candidates across feeds and returns one entry per story,
+    hottest first: {"topic": representative, "members": [...], "score"}.
+    The order is fully deterministic for the same input.
+    """
+    now = now if now is not None else time.time()
+    clusters = cluster_titles([c["title"] for c in candidates])
+
+    ranked = []
+    for indexes in clusters:
+        members = [candidates[i] for i in indexes]
+        # Highest-placed headline represents the story
+        representative = min(members, key=lambda m: (m.get("position", 0), m["title"]))
+        ranked.append(
+            {
+                "topic": representative,
+                "members": members,
+                "score": round(_score(members, feed_count, now), 6),
+            }
+        )
+
+    ranked.sort(key=lambda c: (-c["score"], -len(c["members"]), c["topic"]["title"]))
+    return ranked
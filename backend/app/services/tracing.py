@@ -0,0 +1,219 @@
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+import requests
+
+from app.services import http_client
+
+# =========================
+# CONFIG
+# =========================
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "hotonnet-scheduler")
+# One OTLP/JSON file per trace; empty disables file export
+TRACE_EXPORT_DIR = os.getenv("TRACE_EXPORT_DIR", "traces")
+# e.g. http://localhost:4318 (OTLP/HTTP collector); empty disables
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "name",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+        "status_message",
+    )
+
+    def __init__(self, trace_id: str, parent_span_id: str | None, name: str, attributes: dict):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.status_message = ""
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class Trace:
+    """Collects the finished spans of one pipeline run (thread-safe)."""
+
+    def __init__(self, name: str):
+        self.trace_id = secrets.token_hex(16)
+        self.name = name
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_otlp(self) -> dict:
+        with self._lock:
+            spans = [s.to_otlp() for s in self.spans]
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_otlp_attribute("service.name", SERVICE_NAME)]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "hotonnet.pipeline"}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+# Propagated into worker threads by copying the context (see dag_executor)
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+# =========================
+# PUBLIC API
+# =========================
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times the block as a child of the current span. No-op (yields None)
+    when no trace is active, so agents can be traced unconditionally.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(trace.trace_id, parent.span_id if parent else None, name, attributes)
+    token = _current_span.set(current)
+
+    try:
+        yield current
+    except BaseException as e:
+        current.status = STATUS_ERROR
+        current.status_message = f"{e.__class__.__name__}: {e}"[:500]
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.add(current)
+
+
+def set_attribute(key: str, value):
+    """Sets an attribute on the current span (e.g. which provider served it)."""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """Opens a new trace whose root span is `name`."""
+    trace = Trace(name)
+    trace_token = _current_trace.set(trace)
+    try:
+        with span(name, **attributes):
+            yield trace
+    finally:
+        _current_trace.reset(trace_token)
+
+
+def export_trace(trace: Trace):
+    """Writes OTLP/JSON to TRACE_EXPORT_DIR and/or POSTs it to a collector."""
+    payload = trace.to_otlp()
+
+    if TRACE_EXPORT_DIR:
+        try:
+            directory = Path(TRACE_EXPORT_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"{trace.trace_id}.json").write_text(json.dumps(payload))
+        except OSError as e:
+            print("[Tracing] file export failed:", e)
+
+    if OTLP_ENDPOINT:
+        try:
+            http_client.post(
+                f"{OTLP_ENDPOINT.rstrip('/')}/v1/traces", json=payload, timeout=5
+            ).raise_for_status()
+        except requests.RequestException as e:
+            print("[Tracing] OTLP export failed:", e)
+
+
+def summarize(trace: Trace, stage_attribute: str = "pipeline.stage") -> dict:
+    """
+    Per-stage durations and providers from the spans tagged with
+    `stage_attribute`, plus the root span's total.
+    """
+    stages: dict[str, float] = {}
+    providers: dict[str, str] = {}
+    root = None
+
+    for s in trace.spans:
+        if s.parent_span_id is None:
+            root = s
+        stage = s.attributes.get(stage_attribute)
+        if stage:
+            stages[stage] = round(s.duration_ms, 1)
+            if "provider" in s.attributes:
+                providers[stage] = str(s.attributes["provider"])
+
+    return {
+        "trace_id": trace.trace_id,
+        "status": "ok" if root is None or root.status == STATUS_OK else "error",
+        "duration_ms": round(root.duration_ms, 1) if root else None,
+        "stages": stages,
+        "providers": providers,
+        "span_count": len(trace.spans),
+    }
@@ -2,6 +2,9 @@ import os
 import requests
 from typing import Optional
 
+from app.services import http_client
+from app.services.provider_fixtures import provider_fixture
+
 # -------------------------------------------------
 # BING CONFIG
 # -------------------------------------------------
@@ -13,6 +16,7 @@ SITE_URL = "https://hotonnet.com"
 # -------------------------------------------------
 # BING URL SUBMISSION
 # -------------------------------------------------
+@provider_fixture("bing")
 def submit_url_to_bing(url: str) -> bool:
     """
     Submit a URL to Bing for instant indexing.
@@ -34,7 +38,7 @@ def submit_url_to_bing(url: str) -> bool:
     try:
         print(f"📌 Submitting URL to Bing: {url}")
 
-        response = requests.post(
+        response = http_client.post(
             BING_ENDPOINT,
             json=payload,
             headers=headers,
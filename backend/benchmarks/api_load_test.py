@@ -0,0 +1,250 @@
+"""
+Drives the public API at fixed concurrency and reports latency percentiles,
+throughput and DB queries per request.
+
+Usage (from backend/, against a database filled by seed_data.py):
+    PYTHONPATH=. python benchmarks/api_load_test.py --spawn-server --concurrency 16 --requests 500
+    PYTHONPATH=. python benchmarks/api_load_test.py --compare benchmarks/results/<previous>.json
+
+Queries-per-request comes from the server's /metrics counters, so the target
+must be running this commit's app.main.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+BOT_UA = "facebookexternalhit/1.1"
+
+# name -> (route template used in /metrics, path builder)
+SCENARIOS = {
+    "articles": ("/articles", lambda rng, slugs: f"/articles?page={rng.randint(1, 20)}&limit=10"),
+    "article": ("/article/{slug}", lambda rng, slugs: f"/article/{rng.choice(slugs)}"),
+    "share": ("/share/{slug}", lambda rng, slugs: f"/share/{rng.choice(slugs)}"),
+    "categories": ("/categories", lambda rng, slugs: "/categories"),
+    "sitemap": ("/sitemap.xml", lambda rng, slugs: "/sitemap.xml"),
+    "news_sitemap": ("/news-sitemap.xml", lambda rng, slugs: "/news-sitemap.xml"),
+}
+
+_METRIC_LINE_RE = re.compile(r'^(\w+)\{([^}]*)\} ([0-9.e+-]+)$')
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+# =========================
+# HELPERS
+# =========================
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def scrape_route_counters(base_url: str) -> dict[str, dict[str, float]]:
+    """Returns {route: {"requests": n, "db_statements": n}} from /metrics."""
+    counters: dict[str, dict[str, float]] = {}
+    text = requests.get(f"{base_url}/metrics", timeout=10).text
+
+    for line in text.splitlines():
+        match = _METRIC_LINE_RE.match(line)
+        if not match:
+            continue
+        name, raw_labels, value = match.groups()
+        labels = dict(_LABEL_RE.findall(raw_labels))
+        route = labels.get("route")
+        if not route:
+            continue
+
+        entry = counters.setdefault(route, {"requests": 0.0, "db_statements": 0.0})
+        if name == "http_request_duration_seconds_count":
+            entry["requests"] += float(value)
+        elif name == "http_request_db_statements_total":
+            entry["db_statements"] += float(value)
+
+    return counters
+
+
+def collect_slugs(base_url: str, limit: int = 200) -> list[str]:
+    slugs = []
+    page = 1
+    while len(slugs) < limit:
+        data = requests.get(
+            f"{base_url}/articles", params={"page": page, "limit": 50}, timeout=30
+        ).json()
+        slugs += [item["slug"] for item in data["items"]]
+        if page >= data["totalPages"]:
+            break
+        page += 1
+    return slugs[:limit]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+# =========================
+# LOAD DRIVER
+# =========================
+def run_scenario(
+    base_url: str,
+    name: str,
+    slugs: list[str],
+    *,
+    concurrency: int,
+    total_requests: int,
+    seed: int,
+) -> dict:
+    route, build_path = SCENARIOS[name]
+    rng = random.Random(f"{seed}:{name}")
+    paths = [build_path(rng, slugs) for _ in range(total_requests)]
+
+    local = threading.local()
+    headers = {"User-Agent": BOT_UA} if name == "share" else {}
+
+    def hit(path: str) -> tuple[float, int]:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        resp = session.get(
+            f"{base_url}{path}", headers=headers, timeout=60, allow_redirects=False
+        )
+        return time.perf_counter() - start, resp.status_code
+
+    before = scrape_route_counters(base_url).get(route, {})
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(hit, paths))
+    wall = time.perf_counter() - wall_start
+    after = scrape_route_counters(base_url).get(route, {})
+
+    latencies = sorted(s[0] for s in samples)
+    errors = sum(1 for _, status in samples if status >= 500)
+
+    served = after.get("requests", 0) - before.get("requests", 0)
+    statements = after.get("db_statements", 0) - before.get("db_statements", 0)
+
+    return {
+        "route": route,
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / wall, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "queries_per_request": round(statements / served, 2) if served else None,
+    }
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not become healthy")
+
+
+def print_report(results: dict, baseline: dict | None = None):
+    print(f"\n{'scenario':<14}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>8}")
+    for name, r in results["scenarios"].items():
+        line = (
+            f"{name:<14}{r['throughput_rps']:>9}{r['p50_ms']:>9}"
+            f"{r['p95_ms']:>9}{r['p99_ms']:>9}{str(r['queries_per_request']):>8}"
+        )
+        old = (baseline or {}).get("scenarios", {}).get(name)
+        if old and old["p95_ms"]:
+            delta = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            line += f"   p95 {delta:+.1f}% vs {baseline['commit']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HotOnNet API load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn-server", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=300, help="per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compare", type=Path, help="previous results JSON")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url.rstrip("/")
+    if args.spawn_server:
+        server = spawn_server(args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        slugs = collect_slugs(base_url)
+        if not slugs:
+            sys.exit("No articles found - run benchmarks/seed_data.py first")
+
+        # Warm-up so connection pools and caches are not measured
+        for name in args.scenarios.split(","):
+            run_scenario(base_url, name, slugs, concurrency=2, total_requests=10, seed=0)
+
+        results = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "seed": args.seed,
+            },
+            "scenarios": {},
+        }
+        for name in args.scenarios.split(","):
+            results["scenarios"][name] = run_scenario(
+                base_url,
+                name,
+                slugs,
+                concurrency=args.concurrency,
+                total_requests=args.requests,
+                seed=args.seed,
+            )
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    out = RESULTS_DIR / f"{stamp}_{results['commit']}.json"
+    out.write_text(json.dumps(results, indent=2))
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(results, baseline)
+    print(f"\nResults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
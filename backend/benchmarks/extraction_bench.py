@@ -0,0 +1,214 @@
+"""
+Compares article extraction with parsing in the download threads against
+parsing in the extractor's process pool, over a saved corpus of news pages.
+
+Usage (from backend/):
+    # Save a corpus once (one URL per line), then benchmark offline
+    PYTHONPATH=. python benchmarks/extraction_bench.py --save urls.txt
+    PYTHONPATH=. python benchmarks/extraction_bench.py --sizes 5 20 50 --download-ms 300
+
+Downloads are served from benchmarks/corpus/ after a fixed simulated
+latency, so the two modes differ only in where parsing runs. The corpus
+is cycled when a batch asks for more URLs than it holds; each copy gets
+its own bench= query parameter, which canonical_url keeps, so every URL
+in a batch is a separate extraction.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# extractor_pool is imported as agents.* like the scheduler does
+sys.path[:0] = [str(BACKEND_DIR / "app"), str(BACKEND_DIR)]
+
+# Every batch must really extract, at full download concurrency; with
+# the cache and circuit breaker off no database is used
+os.environ["EXTRACTION_CACHE_TTL_HOURS"] = "0"
+os.environ["DOMAIN_CIRCUIT_BREAKER"] = "off"
+os.environ["EXTRACTION_DOMAIN_CONCURRENCY"] = "1000"
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unused")
+
+from api_load_test import RESULTS_DIR, git_commit  # noqa: E402
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+INDEX_FILE = "index.json"
+# Query parameter that tells cycled copies of a corpus page apart
+BENCH_PARAM = "bench"
+
+
+# =========================
+# CORPUS
+# =========================
+def save_corpus(url_file: Path):
+    from agents.extractor_agent import download_html
+
+    CORPUS_DIR.mkdir(exist_ok=True)
+    index_path = CORPUS_DIR / INDEX_FILE
+    index = json.loads(index_path.read_text()) if index_path.exists() else {}
+
+    urls = [u.strip() for u in url_file.read_text().splitlines() if u.strip()]
+    for url in urls:
+        name = hashlib.sha1(url.encode()).hexdigest()[:16] + ".html"
+        try:
+            (CORPUS_DIR / name).write_text(download_html(url), encoding="utf-8")
+            index[name] = url
+            print(f"✅ {url}")
+        except Exception as e:
+            print(f"❌ {url}: {e}")
+
+    index_path.write_text(json.dumps(index, indent=2))
+    print(f"\n{len(index)} pages in {CORPUS_DIR}")
+
+
+def load_corpus() -> list[tuple[str, str]]:
+    index_path = CORPUS_DIR / INDEX_FILE
+    if not index_path.exists():
+        sys.exit(f"No corpus in {CORPUS_DIR}; create one with --save urls.txt")
+
+    index = json.loads(index_path.read_text())
+    return [
+        (url, (CORPUS_DIR / name).read_text(encoding="utf-8"))
+        for name, url in sorted(index.items())
+        if (CORPUS_DIR / name).exists()
+    ]
+
+
+def with_bench_param(url: str, i: int) -> str:
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True) + [(BENCH_PARAM, str(i))]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def without_bench_param(url: str) -> str:
+    parts = urlsplit(url)
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != BENCH_PARAM
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+# =========================
+# BENCHMARK
+# =========================
+def run_batch(
+    extractor_pool, links: list[dict], workers: int, downloads: list
+) -> tuple[float, int, int]:
+    """(seconds, articles, distinct extractions) for one batch."""
+    downloads.clear()
+    start = time.perf_counter()
+    articles = extractor_pool.extract_articles_parallel(
+        links, max_workers=workers, deadline=3600, max_chars=10**9
+    )
+    return time.perf_counter() - start, len(articles), len(set(downloads))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HotOnNet extraction parse benchmark")
+    parser.add_argument("--save", type=Path, help="file of URLs to download into the corpus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--workers", type=int, default=10, help="download threads")
+    parser.add_argument(
+        "--processes", type=int, default=min(4, os.cpu_count() or 1), help="parser processes"
+    )
+    parser.add_argument("--download-ms", type=float, default=300, help="simulated download latency")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size and mode (median kept)")
+    args = parser.parse_args()
+
+    if args.save:
+        save_corpus(args.save)
+        return
+
+    import agents.extractor_pool as extractor_pool
+
+    corpus = load_corpus()
+    # Keyed like the bench URLs once their bench= parameter is dropped
+    pages = {without_bench_param(url): html for url, html in corpus}
+    print(f"Corpus: {len(corpus)} pages | download {args.download_ms:g} ms | "
+          f"{args.workers} threads | {args.processes} parser processes\n")
+
+    downloads = []
+    downloads_lock = threading.Lock()
+
+    def download_html(url, timeout=10):
+        with downloads_lock:
+            downloads.append(url)
+        time.sleep(args.download_ms / 1000)
+        return pages[without_bench_param(url)]
+
+    extractor_pool.download_html = download_html
+
+    # Start the parser processes outside the timed runs
+    extractor_pool.PARSE_PROCESSES = args.processes
+    warm_start = time.perf_counter()
+    pool = extractor_pool._get_parse_pool()
+    warmups = [pool.submit(extractor_pool.parse_html, u, h) for u, h in corpus[: args.processes]]
+    for future in warmups:
+        future.exception()  # unparseable pages are fine here
+    startup_s = time.perf_counter() - warm_start
+
+    rows = []
+    for size in args.sizes:
+        links = [{"link": with_bench_param(corpus[i % len(corpus)][0], i)} for i in range(size)]
+
+        timings = {}
+        for mode, processes in (("threads", 0), ("processes", args.processes)):
+            extractor_pool.PARSE_PROCESSES = processes
+            runs = [
+                run_batch(extractor_pool, links, args.workers, downloads)
+                for _ in range(args.repeat)
+            ]
+            timings[mode] = {
+                "seconds": round(statistics.median(r[0] for r in runs), 3),
+                "articles": runs[0][1],
+                "extractions": runs[0][2],
+            }
+
+        speedup = timings["threads"]["seconds"] / max(timings["processes"]["seconds"], 1e-9)
+        rows.append({"urls": size, **timings, "speedup": round(speedup, 2)})
+
+    print(
+        f"{'urls':>5} {'extracted':>10} {'threads s':>10} {'processes s':>12} "
+        f"{'speedup':>8} {'articles':>9}"
+    )
+    for row in rows:
+        print(
+            f"{row['urls']:>5} {row['processes']['extractions']:>10} "
+            f"{row['threads']['seconds']:>10.2f} "
+            f"{row['processes']['seconds']:>12.2f} {row['speedup']:>7.2f}x "
+            f"{row['processes']['articles']:>9}"
+        )
+    print(f"\nParser pool startup: {startup_s:.2f}s (paid once per process)")
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "corpus_pages": len(corpus),
+            "workers": args.workers,
+            "processes": args.processes,
+            "download_ms": args.download_ms,
+            "repeat": args.repeat,
+            "cpu_count": os.cpu_count(),
+        },
+        "parser_startup_s": round(startup_s, 3),
+        "sizes": rows,
+    }
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    out = RESULTS_DIR / f"extraction_{stamp}_{results['commit']}.json"
+    out.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,462 @@
+"""
+Runs the real scheduler (DAG, stage slots, checkpoints, tracing) against
+simulated providers and reports articles/hour and where the time goes.
+
+Usage (from backend/, against a LOCAL database created by init_db.py):
+    PYTHONPATH=. python benchmarks/pipeline_bench.py --articles 40 --parallel 4 --time-scale 0.05
+    PYTHONPATH=. python benchmarks/pipeline_bench.py --set writer.error_rate=0.2 --set image.rate_per_min=4
+
+Provider latencies are lognormal (median/p95 per provider), errors and
+rate-limit rejections are retried with exponential backoff, and every
+sleep is multiplied by --time-scale so an hour of pipeline work can be
+simulated in minutes. All reported times are in simulated seconds.
+
+The simulated providers answer through provider_fixtures' replay mode;
+everything else, including parsing the served pages, is the real code.
+Parsing is real CPU time and is not scaled.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# The scheduler imports agents.* relative to app/ (it is run as app/scheduler.py)
+sys.path[:0] = [str(BACKEND_DIR / "app"), str(BACKEND_DIR)]
+
+# Providers answer from the simulated ones below (replay mode also sets
+# dummy credentials so module-level clients can be built offline)
+os.environ["PROVIDER_MODE"] = "replay"
+# Traces are collected in memory below
+os.environ.setdefault("TRACE_EXPORT_DIR", "")
+# Every pipeline pays for its extractions, as on a cold cache
+os.environ["EXTRACTION_CACHE_TTL_HOURS"] = "0"
+# Simulated failures all hit example.com; they must not trip its circuit
+# or queue behind its per-domain limit
+os.environ["DOMAIN_CIRCUIT_BREAKER"] = "off"
+os.environ["EXTRACTION_DOMAIN_CONCURRENCY"] = "1000"
+
+from api_load_test import RESULTS_DIR, git_commit, percentile  # noqa: E402
+from seed_data import assert_local_database  # noqa: E402
+
+# name -> latency median/p95 (ms), error rate, provider rate limit (0 = none),
+# retries before the call fails (extraction failures are simply skipped)
+DEFAULT_PROFILES = {
+    "search": {"median_ms": 600, "p95_ms": 2000, "error_rate": 0.02, "rate_per_min": 0, "max_retries": 2},
+    "extract": {"median_ms": 1500, "p95_ms": 6000, "error_rate": 0.15, "rate_per_min": 0, "max_retries": 0},
+    "writer": {"median_ms": 20000, "p95_ms": 45000, "error_rate": 0.03, "rate_per_min": 30, "max_retries": 3},
+    "image_prompt": {"median_ms": 3000, "p95_ms": 8000, "error_rate": 0.03, "rate_per_min": 30, "max_retries": 3},
+    "image": {"median_ms": 12000, "p95_ms": 40000, "error_rate": 0.08, "rate_per_min": 10, "max_retries": 4},
+    "x": {"median_ms": 800, "p95_ms": 2500, "error_rate": 0.02, "rate_per_min": 0, "max_retries": 1},
+    "push": {"median_ms": 300, "p95_ms": 1000, "error_rate": 0.01, "rate_per_min": 0, "max_retries": 1},
+    "bing": {"median_ms": 400, "p95_ms": 1500, "error_rate": 0.02, "rate_per_min": 0, "max_retries": 1},
+}
+
+RETRY_BACKOFF_MS = 2000
+
+# Stage -> shared slot pool it holds (see scheduler.STAGE_SLOTS)
+STAGE_POOLS = {
+    "links": "search",
+    "articles": "extraction",
+    "article": "llm",
+    "image_prompt": "llm",
+    "image": "image",
+}
+
+BENCH_TOPIC_PREFIX = "Benchmark topic"
+
+
+# =========================
+# SIMULATED PROVIDERS
+# =========================
+class ProviderError(RuntimeError):
+    pass
+
+
+class SimulatedProvider:
+    """Latency, failures and a token-bucket rate limit, in simulated time."""
+
+    def __init__(self, name: str, profile: dict, *, scale: float, seed: int):
+        self.name = name
+        self.scale = scale
+        self.error_rate = profile["error_rate"]
+        self.max_retries = int(profile["max_retries"])
+
+        # lognormal: median = e^mu, p95 = e^(mu + 1.645 sigma)
+        self.mu = math.log(profile["median_ms"] / 1000)
+        self.sigma = max(0.0, math.log(profile["p95_ms"] / profile["median_ms"]) / 1.645)
+
+        self.rate = profile["rate_per_min"] / 60
+        self.capacity = max(1.0, self.rate * 10)
+        self.tokens = self.capacity
+        self.refilled_at = self._now()
+
+        self.rng = random.Random(f"{seed}:{name}")
+        self.lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "failed_calls": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "busy_s": 0.0,
+            "retry_blocked_s": 0.0,
+        }
+
+    def _now(self) -> float:
+        return time.monotonic() / self.scale
+
+    def _sleep(self, seconds: float):
+        time.sleep(seconds * self.scale)
+
+    def _admit(self) -> bool:
+        if not self.rate:
+            return True
+        now = self._now()
+        self.tokens = min(self.capacity, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def call(self):
+        with self.lock:
+            self.stats["calls"] += 1
+
+        for attempt in range(self.max_retries + 1):
+            with self.lock:
+                admitted = self._admit()
+                latency = self.rng.lognormvariate(self.mu, self.sigma)
+                failed = self.rng.random() < self.error_rate
+                jitter = self.rng.uniform(0.5, 1.5)
+
+            if not admitted:
+                # 429s come back fast
+                latency = min(latency, 0.2)
+                with self.lock:
+                    self.stats["rate_limited"] += 1
+            elif failed:
+                with self.lock:
+                    self.stats["errors"] += 1
+
+            self._sleep(latency)
+            with self.lock:
+                self.stats["busy_s"] += latency
+
+            if admitted and not failed:
+                return
+
+            if attempt < self.max_retries:
+                backoff = RETRY_BACKOFF_MS / 1000 * 2**attempt * jitter
+                with self.lock:
+                    self.stats["retry_blocked_s"] += backoff
+                self._sleep(backoff)
+
+        with self.lock:
+            self.stats["failed_calls"] += 1
+        raise ProviderError(f"{self.name}: gave up after {self.max_retries + 1} attempts")
+
+
+def install_replay_sources(providers: dict[str, SimulatedProvider], seed: int):
+    """
+    Answers every provider call the scheduler makes from a simulated
+    provider, through the replay mode of provider_fixtures. Everything
+    between the providers (DAG, slots, extraction pool and parsing,
+    checkpoints) is the real code.
+    """
+    from app.services.provider_fixtures import set_replay_source
+
+    counter = iter(range(10**9))
+    counter_lock = threading.Lock()
+    sentence = "Simulated sentence about the story with enough words to count. "
+    filler = (sentence * 60).strip()
+    # Served to the real parser, so extraction pays for lxml as in production
+    page = (
+        "<html><head><title>{url}</title></head><body><article><h1>{url}</h1>"
+        + "".join(f"<p>{sentence * 6}</p>" for _ in range(10))
+        + "</article></body></html>"
+    )
+
+    vocabulary = (
+        "storm court vote merger launch strike summit ruling outbreak rally "
+        "tariff drought election probe recall treaty budget quake protest deal "
+        "satellite vaccine pipeline festival blackout wildfire lawsuit heatwave"
+    ).split()
+    title_rng = random.Random(seed)
+
+    def topics():
+        with counter_lock:
+            start = next(counter)
+            # Distinct vocabulary per headline so they do not cluster together
+            words = [" ".join(title_rng.sample(vocabulary, 6)) for _ in range(50)]
+        providers["search"].call()
+        return [
+            {
+                "title": f"{BENCH_TOPIC_PREFIX} {words[i]}",
+                "raw_link": f"https://example.com/topic/{start}-{i}",
+                "summary": "",
+                "feed": "bench",
+                "position": i,
+                "published": time.time(),
+            }
+            for i in range(50)
+        ]
+
+    def search(topic, limit):
+        providers["search"].call()
+        return [
+            {"title": f"{topic} ({i})", "link": f"https://example.com/{i}", "summary": filler[:200]}
+            for i in range(limit)
+        ]
+
+    def extract_html(url):
+        providers["extract"].call()
+        return page.format(url=url)
+
+    def writer(topic, context):
+        providers["writer"].call()
+        return {
+            "title": f"{topic} explained",
+            "summary": filler[:180],
+            "body": filler,
+            "category": "Explainers",
+            "provider": "simulated",
+        }
+
+    def image_prompt(topic, category):
+        providers["image_prompt"].call()
+        return {
+            "prompt": f"Wide photo about {topic}",
+            "negative_prompt": "blurry",
+            "humans_allowed": False,
+            "provider": "simulated",
+        }
+
+    def image(prompt, negative_prompt, topic, humans_allowed):
+        providers["image"].call()
+        return "https://example.com/image.jpg", "simulated"
+
+    def x(title, slug, image_url):
+        providers["x"].call()
+        return "0"
+
+    def push(title, body, url, image_url):
+        providers["push"].call()
+        return {"success": 1, "failure": 0}
+
+    def bing(url):
+        providers["bing"].call()
+        return True
+
+    def gnews(urls, publishers):
+        # Topic links are not Google News links here; nothing to decode
+        return {}
+
+    sources = {
+        "topics": topics,
+        "search": search,
+        "extract_html": extract_html,
+        "writer": writer,
+        "image_prompt": image_prompt,
+        "image": image,
+        "x": x,
+        "push": push,
+        "bing": bing,
+        "gnews": gnews,
+    }
+    for name, source in sources.items():
+        set_replay_source(name, source)
+
+
+# =========================
+# REPORTING
+# =========================
+def stage_report(traces: list, scale: float, sim_wall: float, limits: dict) -> dict:
+    durations: dict[str, list[float]] = {}
+    waits: dict[str, float] = {}
+
+    for trace in traces:
+        for s in trace.spans:
+            stage = s.attributes.get("pipeline.stage")
+            if not stage:
+                continue
+            wait = s.attributes.get("slot_wait_ms", 0) / 1000
+            durations.setdefault(stage, []).append(s.duration_ms / 1000 / scale - wait / scale)
+            waits[stage] = waits.get(stage, 0.0) + wait / scale
+
+    stages = {}
+    for stage, values in durations.items():
+        values.sort()
+        pool = STAGE_POOLS.get(stage)
+        stages[stage] = {
+            "count": len(values),
+            "busy_s": round(sum(values), 1),
+            "mean_s": round(sum(values) / len(values), 2),
+            "p95_s": round(percentile(values, 95), 2),
+            "slot_wait_s": round(waits.get(stage, 0.0), 1),
+            "pool": pool,
+        }
+
+    pools = {}
+    for pool, limit in limits.items():
+        busy = sum(s["busy_s"] for s in stages.values() if s["pool"] == pool)
+        pools[pool] = {
+            "slots": limit,
+            "utilization": round(busy / (sim_wall * limit), 3) if sim_wall else 0.0,
+        }
+
+    return {"stages": stages, "pools": pools}
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def print_report(results: dict):
+    print(
+        f"\n📈 {results['published']} published, {results['failed']} failed "
+        f"in {results['simulated_s']}s simulated → {results['articles_per_hour']} articles/hour"
+    )
+    print(f"   peak RSS {results['max_rss_mb']} MB (+{results['rss_growth_mb']} MB)")
+
+    print(f"\n{'stage':<14}{'count':>7}{'mean s':>9}{'p95 s':>9}{'busy s':>10}{'slot wait s':>13}")
+    for name, s in results["stages"].items():
+        print(
+            f"{name:<14}{s['count']:>7}{s['mean_s']:>9}{s['p95_s']:>9}"
+            f"{s['busy_s']:>10}{s['slot_wait_s']:>13}"
+        )
+
+    print(f"\n{'pool':<14}{'slots':>7}{'util':>9}")
+    for name, p in results["pools"].items():
+        print(f"{name:<14}{p['slots']:>7}{p['utilization']:>9.1%}")
+
+    print(f"\n{'provider':<14}{'calls':>7}{'errors':>8}{'429s':>7}{'gave up':>9}{'retry blocked s':>17}")
+    for name, p in results["providers"].items():
+        print(
+            f"{name:<14}{p['calls']:>7}{p['errors']:>8}{p['rate_limited']:>7}"
+            f"{p['failed_calls']:>9}{round(p['retry_blocked_s'], 1):>17}"
+        )
+
+
+def cleanup(db):
+    from sqlalchemy import text
+
+    db.execute(
+        text("DELETE FROM pipeline_runs WHERE topic->>'title' LIKE :prefix"),
+        {"prefix": f"{BENCH_TOPIC_PREFIX}%"},
+    )
+    db.execute(text("DELETE FROM articles WHERE topic LIKE :prefix"), {"prefix": f"{BENCH_TOPIC_PREFIX}%"})
+    db.commit()
+
+
+def parse_overrides(pairs: list[str], profiles: dict) -> dict:
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        provider, _, field = key.partition(".")
+        if provider not in profiles or field not in profiles[provider]:
+            sys.exit(f"Unknown override '{key}'")
+        profiles[provider][field] = float(value)
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HotOnNet pipeline throughput benchmark")
+    parser.add_argument("--articles", type=int, default=20, help="pipelines to run")
+    parser.add_argument("--parallel", type=int, default=4, help="MAX_PARALLEL_ARTICLES")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="real seconds per simulated second")
+    parser.add_argument("--profile", type=Path, help="JSON overriding DEFAULT_PROFILES")
+    parser.add_argument("--set", action="append", default=[], help="provider.field=value")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep benchmark rows in the DB")
+    parser.add_argument("--allow-remote", action="store_true")
+    args = parser.parse_args()
+
+    profiles = json.loads(json.dumps(DEFAULT_PROFILES))
+    if args.profile:
+        for name, fields in json.loads(args.profile.read_text()).items():
+            profiles.setdefault(name, {}).update(fields)
+    profiles = parse_overrides(args.set, profiles)
+
+    os.environ["MAX_PARALLEL_ARTICLES"] = str(args.parallel)
+
+    assert_local_database(args.allow_remote)
+
+    import scheduler
+    from app.db.database import SessionLocal
+
+    providers = {
+        name: SimulatedProvider(name, profile, scale=args.time_scale, seed=args.seed)
+        for name, profile in profiles.items()
+    }
+    install_replay_sources(providers, args.seed)
+
+    traces = []
+    scheduler.export_trace = traces.append
+
+    rss_start = max_rss_mb()
+    published = failed = 0
+    wall_start = time.monotonic()
+
+    remaining = args.articles
+    while remaining > 0:
+        batch = min(remaining, args.parallel)
+        try:
+            results = scheduler.run(n=batch, resume=False)
+        except RuntimeError as e:
+            print("⚠️ Batch failed:", e)
+            results = [{"status": "failed"}] * batch
+        published += sum(1 for r in results if r["status"] == "ok")
+        failed += sum(1 for r in results if r["status"] != "ok")
+        remaining -= batch
+
+    sim_wall = (time.monotonic() - wall_start) / args.time_scale
+
+    report = stage_report(traces, args.time_scale, sim_wall, scheduler.STAGE_LIMITS)
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "articles": args.articles,
+            "parallel": args.parallel,
+            "stage_limits": scheduler.STAGE_LIMITS,
+            "time_scale": args.time_scale,
+            "seed": args.seed,
+            "profiles": profiles,
+        },
+        "published": published,
+        "failed": failed,
+        "simulated_s": round(sim_wall, 1),
+        "articles_per_hour": round(published / sim_wall * 3600, 1) if sim_wall else 0.0,
+        "max_rss_mb": max_rss_mb(),
+        "rss_growth_mb": round(max_rss_mb() - rss_start, 1),
+        **report,
+        "providers": {name: p.stats for name, p in providers.items()},
+    }
+
+    if not args.keep:
+        db = SessionLocal()
+        try:
+            cleanup(db)
+        finally:
+            db.close()
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    out = RESULTS_DIR / f"pipeline_{stamp}_{results['commit']}.json"
+    out.write_text(json.dumps(results, indent=2))
+
+    print_report(results)
+    print(f"\nResults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
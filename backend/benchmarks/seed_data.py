@@ -0,0 +1,162 @@
+"""
+Seeds a LOCAL Postgres with deterministic benchmark data.
+
+Usage (from backend/):
+    PYTHONPATH=. python benchmarks/seed_data.py --categories 9 --articles 5000 --tokens 2000 --reset
+
+The same --seed always produces the same rows, so results from different
+commits are comparable.
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+from slugify import slugify
+from sqlalchemy import insert, text
+
+from app.db.database import DATABASE_URL, SessionLocal, engine
+from app.db.models import Article, Base, Category, NotificationToken
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "db", "postgres"}
+
+CATEGORY_NAMES = [
+    "Global Affairs",
+    "Science",
+    "Tech",
+    "Business",
+    "Lifestyle",
+    "Health",
+    "Sports",
+    "Entertainment",
+    "Explainers",
+]
+
+WORDS = (
+    "market election climate launch court policy report study team season "
+    "energy summit trade storm vaccine budget deal league network region "
+    "minister company record growth security health research data city"
+).split()
+
+BATCH_SIZE = 1000
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, n_words: int) -> str:
+    sentences = [_sentence(rng, rng.randint(10, 20)) for _ in range(n_words // 15)]
+    return "\n\n".join(" ".join(sentences[i : i + 5]) for i in range(0, len(sentences), 5))
+
+
+def assert_local_database(allow_remote: bool):
+    host = urlparse(DATABASE_URL).hostname or ""
+    if host not in LOCAL_HOSTS and not allow_remote:
+        sys.exit(
+            f"Refusing to seed non-local database host '{host}'. "
+            "Pass --allow-remote if this is really a disposable database."
+        )
+
+
+def reset(db):
+    db.execute(
+        text("TRUNCATE articles, categories, notification_tokens RESTART IDENTITY CASCADE")
+    )
+    db.commit()
+
+
+def seed(db, *, categories: int, articles: int, tokens: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    # ── Categories ──
+    names = CATEGORY_NAMES[:categories] + [
+        f"Category {i}" for i in range(len(CATEGORY_NAMES), categories)
+    ]
+    category_ids = []
+    for name in names:
+        category = Category(name=name, slug=slugify(name))
+        db.add(category)
+        db.flush()
+        category_ids.append(category.id)
+    db.commit()
+
+    # ── Articles (spread over 60 days so the news sitemap has a recent slice) ──
+    rows = []
+    for i in range(articles):
+        title = f"{_sentence(rng, 8)[:-1]} {i}"
+        rows.append(
+            {
+                "topic": f"bench topic {seed}-{i}",
+                "title": title,
+                "slug": f"bench-{seed}-{i}",
+                "summary": _sentence(rng, 30),
+                "content": _paragraphs(rng, 600),
+                "image_url": (
+                    "https://res.cloudinary.com/demo/image/upload/"
+                    f"v1/ai_news_images/news_bench_{i}.jpg"
+                ),
+                "image_model": "benchmark",
+                "category_id": rng.choice(category_ids),
+                "views": rng.randint(0, 5000),
+                "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 60)),
+            }
+        )
+        if len(rows) >= BATCH_SIZE:
+            db.execute(insert(Article), rows)
+            rows = []
+    if rows:
+        db.execute(insert(Article), rows)
+    db.commit()
+
+    # ── Notification tokens ──
+    rows = [
+        {
+            "token": f"bench-token-{seed}-{i}",
+            "platform": "web",
+            "browser": rng.choice(["chrome", "firefox", "safari"]),
+            "is_active": rng.random() > 0.1,
+        }
+        for i in range(tokens)
+    ]
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(NotificationToken), rows[start : start + BATCH_SIZE])
+    db.commit()
+
+    return {"categories": len(names), "articles": articles, "tokens": tokens, "seed": seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--categories", type=int, default=9)
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="truncate tables first")
+    parser.add_argument("--allow-remote", action="store_true")
+    args = parser.parse_args()
+
+    assert_local_database(args.allow_remote)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        if args.reset:
+            reset(db)
+        summary = seed(
+            db,
+            categories=args.categories,
+            articles=args.articles,
+            tokens=args.tokens,
+            seed=args.seed,
+        )
+        print("Seeded:", summary)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
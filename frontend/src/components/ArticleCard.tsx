@@ -2,6 +2,7 @@ import { Link } from "wouter";
 import { format } from "date-fns";
 import { motion } from "framer-motion";
 import { ArticleWithCategory } from "@/models/schema";
+import { ResponsiveImage } from "@/components/ResponsiveImage";
 
 interface ArticleCardProps {
   article: ArticleWithCategory;
@@ -21,8 +22,10 @@ export function ArticleCard({ article, featured = false }: ArticleCardProps) {
       >
         <Link href={`/article/${article.slug}`} className="block overflow-hidden rounded-2xl aspect-[4/3] md:aspect-[16/10] shadow-md">
           <div className="w-full h-full bg-muted relative overflow-hidden">
-            <img 
-              src={article.imageUrl} 
+            <ResponsiveImage
+              src={article.imageVariants?.hero.jpg ?? article.imageUrl}
+              srcSet={article.imageSrcSet}
+              sizes="(min-width: 768px) 50vw, 100vw"
               alt={article.title}
               className="w-full h-full object-cover transform group-hover:scale-110 transition-transform duration-700 ease-in-out"
             />
@@ -72,9 +75,12 @@ export function ArticleCard({ article, featured = false }: ArticleCardProps) {
     >
       <Link href={`/article/${article.slug}`} className="block overflow-hidden rounded-xl aspect-[3/2] mb-5 shadow-sm">
         <div className="w-full h-full bg-muted relative overflow-hidden">
-          <img 
-            src={article.imageUrl} 
+          <ResponsiveImage
+            src={article.imageVariants?.card.jpg ?? article.imageUrl}
+            srcSet={article.imageSrcSet}
+            sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
             alt={article.title}
+            loading="lazy"
             className="w-full h-full object-cover transform group-hover:scale-110 transition-transform duration-500 ease-in-out"
           />
         </div>
@@ -0,0 +1,23 @@
+import { ImgHTMLAttributes } from "react";
+import { ImageSrcSet } from "@/models/schema";
+
+interface ResponsiveImageProps extends ImgHTMLAttributes<HTMLImageElement> {
+  srcSet?: ImageSrcSet | null;
+  sizes: string;
+}
+
+// AVIF → WebP → JPEG, each with width descriptors so the browser picks the
+// smallest rendition that fills the slot. Falls back to a plain <img>.
+export function ResponsiveImage({ srcSet, sizes, ...imgProps }: ResponsiveImageProps) {
+  if (!srcSet) {
+    return <img {...imgProps} />;
+  }
+
+  return (
+    <picture className="contents">
+      <source type="image/avif" srcSet={srcSet.avif} sizes={sizes} />
+      <source type="image/webp" srcSet={srcSet.webp} sizes={sizes} />
+      <img {...imgProps} srcSet={srcSet.jpg} sizes={sizes} />
+    </picture>
+  );
+}
@@ -8,6 +8,28 @@ export interface Category {
   slug: string;
 }
 
+// Derived Cloudinary renditions (backend: app/services/image_variants.py)
+export interface ImageVariant {
+  width: number;
+  height: number;
+  avif?: string;
+  webp?: string;
+  jpg: string;
+}
+
+export interface ImageVariants {
+  thumbnail: ImageVariant;
+  card: ImageVariant;
+  hero: ImageVariant;
+  og: ImageVariant;
+}
+
+export interface ImageSrcSet {
+  avif: string;
+  webp: string;
+  jpg: string;
+}
+
 export interface Article {
   id: string;
   topic: string;
@@ -16,6 +38,8 @@ export interface Article {
   content: string;       // HTML or markdown
   summary: string;
   imageUrl?: string;     // optional (important)
+  imageVariants?: ImageVariants | null;
+  imageSrcSet?: ImageSrcSet | null;
   categoryId: string;
   views: number;
   createdAt: string;     // ISO string from API
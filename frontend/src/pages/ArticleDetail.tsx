@@ -12,6 +12,9 @@ import { AdSense } from "@/components/AdSense";
 import { AdPreview } from "@/components/AdPreview";
 import { API_URL } from "@/api/apiClient";
 
+// Hero sits in a max-w-5xl container
+const HERO_SIZES = "(min-width: 1024px) 1024px, 100vw";
+
 export default function ArticleDetail() {
   const [, params] = useRoute("/article/:slug");
   const slug = params?.slug || "";
@@ -112,7 +115,7 @@ export default function ArticleDetail() {
   const seoTitle = article.title;
   const seoDescription =
     article.summary || article.content.substring(0, 160) + "...";
-  const seoImage = article.imageUrl || "";
+  const seoImage = article.imageVariants?.og.jpg || article.imageUrl || "";
 
   const handleShare = async () => {
     try {
@@ -257,15 +260,25 @@ export default function ArticleDetail() {
             {article.imageUrl ? (
               <div className="container mx-auto px-4 max-w-5xl mt-12 md:mt-16">
                 <div className="relative overflow-hidden rounded-2xl shadow-2xl bg-gradient-to-b from-secondary/20 to-transparent">
-                  <motion.img
-                    initial={{ opacity: 0, y: 20 }}
-                    animate={{ opacity: 1, y: 0 }}
-                    transition={{ duration: 0.8, ease: "easeOut" }}
-                    src={article.imageUrl}
-                    alt={article.title}
-                    className="w-full h-auto max-h-[80vh] object-contain mx-auto"
-                    loading="eager"
-                  />
+                  <picture className="contents">
+                    {article.imageSrcSet && (
+                      <>
+                        <source type="image/avif" srcSet={article.imageSrcSet.avif} sizes={HERO_SIZES} />
+                        <source type="image/webp" srcSet={article.imageSrcSet.webp} sizes={HERO_SIZES} />
+                      </>
+                    )}
+                    <motion.img
+                      initial={{ opacity: 0, y: 20 }}
+                      animate={{ opacity: 1, y: 0 }}
+                      transition={{ duration: 0.8, ease: "easeOut" }}
+                      src={article.imageVariants?.hero.jpg ?? article.imageUrl}
+                      srcSet={article.imageSrcSet?.jpg}
+                      sizes={HERO_SIZES}
+                      alt={article.title}
+                      className="w-full h-auto max-h-[80vh] object-contain mx-auto"
+                      loading="eager"
+                    />
+                  </picture>
                   <div className="absolute inset-0 bg-gradient-to-t from-black/30 via-transparent to-transparent pointer-events-none" />
                 </div>
               </div>